@@ -1,12 +1,18 @@
 import os
-import re
-from flask import Flask, request, jsonify
+import json
+import threading
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 from pymongo import MongoClient
 from datetime import datetime
 import requests
 from ml.ml_service import MLService
+from ml.interaction_logger import InteractionLogWriter
+from ml.order_lookup import OrderLookup
+from ml.procstats import process_memory
+from ml.response_rules import ResponseRules
+from ml.entities import EntityExtractor
 
 # Load environment variables
 load_dotenv()
@@ -20,19 +26,61 @@ ml_service = MLService()
 # MongoDB Setup
 interactions_col = None
 orders_col = None
+interaction_logger = None
+order_lookup = None
 
-try:
-    uri = os.getenv("MONGODB_URI")
-    if uri:
-        mongo_client = MongoClient(uri)
-        db = mongo_client.get_database()
-        interactions_col = db["user_interactions"]
-        orders_col = db["orders"]
-        print("✅ Connected to MongoDB")
-    else:
-        print("⚠️ MONGODB_URI not found in environment")
-except Exception as e:
-    print(f"❌ MongoDB connection error: {e}")
+def connect_mongo():
+    """Creates the Mongo client and the components built on it (called again in each forked worker)."""
+    global interactions_col, orders_col, interaction_logger, order_lookup
+    try:
+        uri = os.getenv("MONGODB_URI")
+        if uri:
+            mongo_client = MongoClient(
+                uri,
+                maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+                minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "2")),
+                waitQueueTimeoutMS=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")),
+                serverSelectionTimeoutMS=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+                connectTimeoutMS=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+                socketTimeoutMS=int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000"))
+            )
+            db = mongo_client.get_database()
+            interactions_col = db["user_interactions"]
+            orders_col = db["orders"]
+            # Read-through order cache (with negative caching) in front of find_one
+            order_lookup = OrderLookup(
+                orders_col,
+                ttl=float(os.getenv("ORDER_CACHE_TTL", "30")),
+                negative_ttl=float(os.getenv("ORDER_CACHE_NEGATIVE_TTL", "10"))
+            )
+            # Off the startup path: blocks for the server selection timeout if Mongo is down
+            threading.Thread(target=order_lookup.ensure_index, daemon=True).start()
+            # Interaction logs are written in batches by a background thread
+            interaction_logger = InteractionLogWriter(
+                interactions_col,
+                max_queue=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+                batch_size=int(os.getenv("LOG_BATCH_SIZE", "100")),
+                flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+            )
+            print("✅ Connected to MongoDB")
+        else:
+            print("⚠️ MONGODB_URI not found in environment")
+    except Exception as e:
+        print(f"❌ MongoDB connection error: {e}")
+
+connect_mongo()
+
+def after_fork():
+    """
+    Called in each worker forked from a preloaded parent (see gunicorn.conf.py).
+    Models stay shared copy-on-write; threads and Mongo sockets do not survive
+    fork, so they are recreated here.
+    """
+    ml_service.after_fork()
+    connect_mongo()
+
+response_rules = ResponseRules()
+entity_extractor = EntityExtractor(keywords=response_rules.keywords)
 
 # --- INTENT RESPONSE MAP ---
 INTENT_RESPONSES = {
@@ -74,12 +122,70 @@ def get_secured_order_details(order_id):
     # response = requests.get(f"https://api.ecommerce.com/orders/{order_id}", headers={"Authorization": f"Bearer {token}"})
     
     # For now, fallback to local MongoDB (as instructed to keep existing functionality)
-    if orders_col is None:
+    if order_lookup is None:
         return None
-    order = orders_col.find_one({"orderNumber": order_id})
-    if order:
-        return f"Order {order['orderNumber']}\nStatus: {order['status']}\nItems: {', '.join(order['items'])}\nTotal: ${order['total']}"
-    return None
+    return order_lookup.get_details(order_id)
+
+def build_chat_response(message, analysis):
+    """
+    Turns the model output for a message into the /chat payload: guardrails,
+    order lookup, category links and interaction logging. Shared by the Flask
+    app and the async app in asgi_app.py.
+    """
+    intent = analysis["intent"]
+    sentiment = analysis["sentiment"]
+    overridden_from = None
+
+    # 2. Sentiment Guardrail: Don't be too happy if the user is upset
+    # Note: We only override positive_feedback. Greetings stay as greetings.
+    if sentiment == "negative" and intent == "positive_feedback":
+        overridden_from = intent
+        intent = "product_issue"
+
+    # 3. Extract Order ID, products and rule keywords (one compiled pass over the message)
+    entities, keywords = entity_extractor.scan(message)
+    order_id = entities["order_id"]
+
+    # 3. Handle Dynamic Intent (Orders)
+    if intent == "get_order":
+        if order_id:
+            details = get_secured_order_details(order_id)
+            if details:
+                reply = details
+            else:
+                reply = f"No order found with number {order_id}."
+        else:
+            reply = "Please provide an order number."
+    else:
+        # 4. Keyword variations: category links, product care (see ml/response_rules.py)
+        reply = response_rules.reply_for(intent, keywords) or INTENT_RESPONSES.get(intent, INTENT_RESPONSES["unknown"])
+
+    # 5. Log to MongoDB for Continuous Learning (queued, never blocks the reply)
+    if interaction_logger is not None:
+        interaction_logger.log({
+            "text": message,
+            "intent": intent,
+            "sentiment": sentiment,
+            "timestamp": datetime.now()
+        })
+
+    response = {
+        'reply': reply,
+        'intent': intent,
+        'confidence': analysis["confidence"],
+        'top_intents': analysis["top_intents"],
+        'sentiment': sentiment,
+        'entities': entities
+    }
+    if overridden_from:
+        # confidence and top_intents stay the model's scores for the original intent
+        response['overridden_from'] = overridden_from
+    return response
+
+def build_predict_response(message, intent, sentiment):
+    """/predict payload; server.js reads `order_id` from it for get_order."""
+    entities = entity_extractor.extract(message)
+    return {'intent': intent, 'sentiment': sentiment, 'order_id': entities["order_id"], 'entities': entities}
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -90,77 +196,9 @@ def chat():
         if not message:
             return jsonify({'reply': "Please say something!"})
 
-        # 1. Prediction
-        intent = ml_service.predict_intent(message)
-        sentiment = ml_service.predict_sentiment(message)
-
-        # 2. Sentiment Guardrail: Don't be too happy if the user is upset
-        # Note: We only override positive_feedback. Greetings stay as greetings.
-        if sentiment == "negative" and intent == "positive_feedback":
-            intent = "product_issue"
-
-        # 3. Extract Order ID
-        order_id = None
-        lower_msg = message.lower()
-        if intent == "get_order" or "order" in lower_msg:
-            order_match = re.search(r'order\s*#?\s*(\d+)', lower_msg)
-            if order_match:
-                order_id = int(order_match.group(1))
-            elif intent == "get_order":
-                nums = re.findall(r'\b\d{5,}\b', lower_msg)
-                if nums: order_id = int(nums[0])
-
-        # 3. Handle Dynamic Intent (Orders)
-        if intent == "get_order":
-            if order_id:
-                details = get_secured_order_details(order_id)
-                if details:
-                    reply = details
-                else:
-                    reply = f"No order found with number {order_id}."
-            else:
-                reply = "Please provide an order number."
-        elif intent == "product_catalog":
-            # Dynamic Category Links
-            if "perfume" in lower_msg or "fragrance" in lower_msg:
-                reply = "You can browse our Perfume collection here: [Perfumes](https://example.com/perfumes) 🌸"
-            elif "makeup" in lower_msg or "lipstick" in lower_msg:
-                reply = "Check out our latest Makeup trends: [Makeup](https://example.com/makeup) 💄"
-            elif "skincare" in lower_msg:
-                reply = "Explore our Skincare range: [Skincare](https://example.com/skincare) ✨"
-            elif "electronics" in lower_msg:
-                reply = "Discover our Tech & Electronics: [Electronics](https://example.com/electronics) 🎧"
-            else:
-                reply = INTENT_RESPONSES.get("product_catalog")
-        else:
-            # 4. Handle Product Care Variations (Ported from server.js)
-            reply = INTENT_RESPONSES.get(intent, INTENT_RESPONSES["unknown"])
-            
-            if intent == "product_care":
-                if "leather" in lower_msg:
-                    reply = "For leather: Wipe with a damp cloth and avoid direct heat."
-                elif "cotton" in lower_msg:
-                    reply = "For cotton: Machine wash cold. Tumble dry low."
-                elif any(x in lower_msg for x in ["silk", "delicate"]):
-                    reply = "For silk: Hand wash cold. Do not wring."
-
-        # 5. Log to MongoDB for Continuous Learning
-        if interactions_col is not None:
-            try:
-                interactions_col.insert_one({
-                    "text": message,
-                    "intent": intent,
-                    "sentiment": sentiment,
-                    "timestamp": datetime.now()
-                })
-            except Exception as e:
-                print(f"Logging error: {e}")
-
-        return jsonify({
-            'reply': reply,
-            'intent': intent,
-            'sentiment': sentiment
-        })
+        # 1. Prediction (micro-batched with other in-flight requests)
+        analysis = ml_service.analyze(message)
+        return jsonify(build_chat_response(message, analysis))
     except Exception as e:
         print(f"🔥 CRITICAL CHAT ERROR: {e}")
         return jsonify({
@@ -175,7 +213,66 @@ def predict():
     message = data.get('message', '')
     intent = ml_service.predict_intent(message)
     sentiment = ml_service.predict_sentiment(message)
-    return jsonify({'intent': intent, 'sentiment': sentiment})
+    return jsonify(build_predict_response(message, intent, sentiment))
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    Bulk scoring for replays/relabeling: {"messages": [...], "chunk_size": 1000}.
+    Results are streamed back as newline-delimited JSON, one line per message.
+    """
+    data = request.get_json(silent=True) or {}
+    messages = data.get('messages')
+    if not isinstance(messages, list):
+        return jsonify({'error': "'messages' must be a list"}), 400
+    chunk_size = parse_chunk_size(data.get('chunk_size', 1000))
+    if chunk_size is None:
+        return jsonify({'error': "'chunk_size' must be a positive integer"}), 400
+
+    def generate():
+        for start in range(0, len(messages), chunk_size):
+            yield predict_batch_chunk(messages[start:start + chunk_size], start)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def parse_chunk_size(value):
+    """The request's chunk_size as a positive int, or None if it is not one."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        size = int(value)
+    except ValueError:
+        return None
+    return size if size >= 1 else None
+
+def predict_batch_chunk(chunk, start):
+    """NDJSON lines for one chunk of /predict_batch messages starting at index `start`."""
+    chunk = [m if isinstance(m, str) else "" for m in chunk]
+    intents = ml_service.predict_intent_batch(chunk)
+    sentiments = ml_service.predict_sentiment_batch(chunk)
+    entities = entity_extractor.extract_batch(chunk)
+    return "".join(
+        json.dumps({'index': start + offset, 'intent': intent, 'sentiment': sentiment, 'entities': found}) + "\n"
+        for offset, (intent, sentiment, found) in enumerate(zip(intents, sentiments, entities))
+    )
+
+@app.route('/health', methods=['GET'])
+def health():
+    # Per-component load status/timings; sentiment falls back to VADER until the LSTM is warm
+    status = ml_service.health()
+    status["process"] = process_memory()
+    return jsonify(status)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify(service_metrics())
+
+def service_metrics():
+    # Batch-size / wait-time histograms for tuning ML_BATCH_WINDOW_MS and ML_BATCH_MAX_SIZE
+    stats = ml_service.stats()
+    stats["interaction_log"] = interaction_logger.stats() if interaction_logger is not None else None
+    stats["order_cache"] = order_lookup.stats() if order_lookup is not None else None
+    return stats
 
 if __name__ == '__main__':
     # Using 5001 as the primary backend port now
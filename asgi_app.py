@@ -0,0 +1,102 @@
+"""
+Async serving mode for the chat service.
+
+Same /chat, /predict and /predict_batch contracts as app.py, served by Quart
+under an ASGI server, so one process can hold thousands of open requests:
+
+    hypercorn asgi_app:app --bind 0.0.0.0:5001
+
+Model inference runs on a bounded thread pool (ML_INFERENCE_WORKERS) where it
+joins MLService micro-batches; blocking pymongo calls (order lookups) run on a
+separate pool sized to the Mongo connection pool.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, request, jsonify, Response
+from quart_cors import cors
+
+from app import (ml_service, build_chat_response, build_predict_response, parse_chunk_size,
+                 predict_batch_chunk, service_metrics, process_memory)
+
+app = cors(Quart(__name__))
+
+inference_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ML_INFERENCE_WORKERS", "64")), thread_name_prefix="inference"
+)
+io_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("MONGO_MAX_POOL_SIZE", "50")), thread_name_prefix="mongo-io"
+)
+
+
+async def run_inference(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(inference_executor, fn, *args)
+
+
+async def run_io(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(io_executor, fn, *args)
+
+
+@app.route('/chat', methods=['POST'])
+async def chat():
+    try:
+        data = await request.get_json()
+        message = data.get('message', '')
+
+        if not message:
+            return jsonify({'reply': "Please say something!"})
+
+        analysis = await run_inference(ml_service.analyze, message)
+        return jsonify(await run_io(build_chat_response, message, analysis))
+    except Exception as e:
+        print(f"🔥 CRITICAL CHAT ERROR: {e}")
+        return jsonify({
+            'reply': f"Internal Error: {str(e)}",
+            'error': str(e)
+        }), 500
+
+
+@app.route('/predict', methods=['POST'])
+async def predict():
+    data = await request.get_json()
+    message = data.get('message', '')
+    # Same calls as app.py's /predict, run side by side on the inference pool
+    intent, sentiment = await asyncio.gather(
+        run_inference(ml_service.predict_intent, message),
+        run_inference(ml_service.predict_sentiment, message)
+    )
+    return jsonify(build_predict_response(message, intent, sentiment))
+
+
+@app.route('/predict_batch', methods=['POST'])
+async def predict_batch():
+    data = await request.get_json(silent=True) or {}
+    messages = data.get('messages')
+    if not isinstance(messages, list):
+        return jsonify({'error': "'messages' must be a list"}), 400
+    chunk_size = parse_chunk_size(data.get('chunk_size', 1000))
+    if chunk_size is None:
+        return jsonify({'error': "'chunk_size' must be a positive integer"}), 400
+
+    async def generate():
+        for start in range(0, len(messages), chunk_size):
+            yield await run_inference(predict_batch_chunk, messages[start:start + chunk_size], start)
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
+@app.route('/health', methods=['GET'])
+async def health():
+    status = ml_service.health()
+    status["process"] = process_memory()
+    return jsonify(status)
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    return jsonify(service_metrics())
+
+
+if __name__ == '__main__':
+    app.run(port=5001)
@@ -0,0 +1,45 @@
+"""
+Multi-process serving: one preloaded master, N forked workers.
+
+    gunicorn app:app                # picks up this file automatically
+
+The master imports app.py (and so loads every model) once, then forks. Model
+weights are read-only, so the workers share those pages copy-on-write instead
+of each paying the full model memory. Check with GET /health ("process") or
+`python -m ml.procstats <master-pid>`.
+"""
+import gc
+import multiprocessing
+import os
+
+# TensorFlow is not fork-safe: a Keras model loaded in the master deadlocks or
+# crashes in the children. Preloading therefore uses the NumPy engine, loaded
+# eagerly so the weights exist before fork, and memory-mapped from the .npy
+# artifacts so they stay shared even after the workers touch them.
+os.environ.setdefault("SENTIMENT_ENGINE", "numpy")
+os.environ.setdefault("ML_LOAD_MODE", "eager")
+os.environ.setdefault("ML_MMAP_WEIGHTS", "1")
+
+bind = os.getenv("BIND", "0.0.0.0:5001")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.getenv("WORKER_THREADS", "8"))
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+
+
+def on_starting(server):
+    if os.environ["SENTIMENT_ENGINE"] != "numpy":
+        server.log.warning("SENTIMENT_ENGINE=%s is not fork-safe with preload_app; "
+                           "use SENTIMENT_ENGINE=numpy", os.environ["SENTIMENT_ENGINE"])
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach: a gc pass in
+    # the child would otherwise write to every object header and un-share the page.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app import after_fork
+    after_fork()
@@ -0,0 +1,86 @@
+"""
+Load-test harness for the chat service. Start the server(s) first, e.g.
+
+    python app.py                                   # Flask, port 5001
+    hypercorn asgi_app:app --bind 0.0.0.0:5002      # async, port 5002
+
+then compare them:
+
+    python loadtest.py --url http://localhost:5001 --url http://localhost:5002 --concurrency 200
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+from ml.benchmark import sample_messages
+
+
+def run_load(url, concurrency, duration, messages):
+    """Keeps `concurrency` keep-alive clients posting to /chat for `duration` seconds."""
+    target = urlparse(url)
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(worker):
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        i = worker
+        local = []
+        while time.perf_counter() < deadline:
+            body = json.dumps({"message": messages[i % len(messages)]})
+            i += concurrency
+            start = time.perf_counter()
+            try:
+                conn.request("POST", "/chat", body, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}")
+                local.append(time.perf_counter() - start)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(w,), daemon=True) for w in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000 if latencies else 0.0
+
+    return {
+        "url": url,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed,
+        "p50_ms": pct(50),
+        "p99_ms": pct(99)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /chat")
+    parser.add_argument("--url", action="append", required=True, help="server base URL (repeat to compare)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    messages = sample_messages(1000)
+    print(f"{'server':<28} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for url in args.url:
+        r = run_load(url, args.concurrency, args.duration, messages)
+        print(f"{r['url']:<28} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f}")
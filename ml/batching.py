@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram used to tune the micro-batcher.
+    Each bucket counts observations <= its upper bound; the last bucket is +Inf.
+    """
+    def __init__(self, bounds):
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for i, bound in enumerate(self.bounds):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            else:
+                self.counts[-1] += 1
+            self.count += 1
+            self.total += value
+
+    def snapshot(self):
+        with self._lock:
+            buckets = {f"<={b}": c for b, c in zip(self.bounds, self.counts)}
+            buckets["+Inf"] = self.counts[-1]
+            return {
+                "buckets": buckets,
+                "count": self.count,
+                "sum": round(self.total, 3),
+                "mean": round(self.total / self.count, 3) if self.count else 0.0
+            }
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many request threads and hands them to
+    `handler` as one list. A batch is dispatched when `max_batch_size` items are
+    waiting or `max_wait_ms` has elapsed since the oldest item arrived.
+    `handler` must return one result per input item, in order.
+    """
+    def __init__(self, handler, max_wait_ms=5.0, max_batch_size=64):
+        self.handler = handler
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.wait_ms = Histogram([0.5, 1, 2, 5, 10, 20, 50, 100])
+
+        self._start()
+
+    def _start(self):
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="ml-micro-batcher", daemon=True)
+        self._thread.start()
+
+    def after_fork(self):
+        """The dispatcher thread does not survive fork(); give the child its own."""
+        self._start()
+
+    def submit(self, item):
+        future = Future()
+        with self._cond:
+            self._pending.append((item, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            size = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            dispatched = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.wait_ms.observe((dispatched - enqueued) * 1000.0)
+            self.batch_sizes.observe(len(batch))
+
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.handler(items)
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+    def stats(self):
+        with self._cond:
+            queued = len(self._pending)
+        return {
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "queued": queued,
+            "batch_size": self.batch_sizes.snapshot(),
+            "wait_ms": self.wait_ms.snapshot()
+        }
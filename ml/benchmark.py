@@ -0,0 +1,528 @@
+"""
+Micro-benchmarks for the ML service. Run from the repository root:
+
+    python -m ml.benchmark intent
+    python -m ml.benchmark intent-engines
+    python -m ml.benchmark sentiment-engines
+    python -m ml.benchmark sentiment-lengths [--engine keras|numpy]
+    python -m ml.benchmark orders [--latency-ms 2]
+    python -m ml.benchmark rules [--rules 500]
+    python -m ml.benchmark sources [--source-mb 1024]
+    python -m ml.benchmark normalize [--messages 1000000]
+    python -m ml.benchmark tokenize
+    python -m ml.benchmark cascade [--vader-threshold 0.5] [--intent-confidence 0.8]
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+# Benchmarks measure the models themselves, not the micro-batching window
+os.environ.setdefault("ML_BATCH_WINDOW_MS", "0")
+
+from ml.data.generate_intents import templates, products, categories
+
+
+def sample_messages(n, seed=42):
+    """Realistic chat messages rendered from the synthetic intent templates."""
+    rng = random.Random(seed)
+    sents = [s for group in templates.values() for s in group]
+    return [
+        rng.choice(sents).format(
+            product=rng.choice(products),
+            category=rng.choice(categories),
+            oid=str(rng.randint(10000, 99999))
+        )
+        for _ in range(n)
+    ]
+
+
+def interaction_texts(limit):
+    """Logged chat messages from user_interactions when MongoDB is configured, else synthetic samples."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    uri = os.getenv("MONGODB_URI")
+    if uri:
+        try:
+            from pymongo import MongoClient
+            interactions_col = MongoClient(uri, serverSelectionTimeoutMS=2000).get_database()["user_interactions"]
+            cursor = interactions_col.find({}, {"text": 1, "_id": 0}).sort("_id", -1).limit(limit)
+            texts = [doc["text"] for doc in cursor if doc.get("text")]
+            if texts:
+                return texts, "user_interactions"
+        except Exception as e:
+            print(f"⚠️ Could not read user_interactions: {e}")
+    return sample_messages(limit), "synthetic templates"
+
+
+def time_per_call(fn, messages, repeat=3):
+    """Returns per-call latencies in microseconds (best of `repeat` runs per message)."""
+    latencies = []
+    for message in messages:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(message)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        latencies.append(best * 1e6)
+    return np.array(latencies)
+
+
+def report(name, latencies):
+    print(
+        f"  {name:<28} mean {latencies.mean():8.1f} µs   "
+        f"p50 {np.percentile(latencies, 50):8.1f} µs   p99 {np.percentile(latencies, 99):8.1f} µs"
+    )
+
+
+def bench_intent(args):
+    from ml.ml_service import MLService
+    # Both paths below go through the scikit-learn model. Sentiment is never requested, so
+    # "lazy" keeps the background TensorFlow load from running alongside the timings, and the
+    # fast path is off so single_pass always reaches the model.
+    os.environ.update(INTENT_ENGINE="sklearn", ML_LOAD_MODE="lazy", ML_FAST_PATH="0")
+    service = MLService()
+    messages = sample_messages(args.iterations)
+
+    def legacy(message):
+        # Pre-refactor path: predict_proba, Python max() and a second predict()
+        X = service.intent_vectorizer.transform([message.lower()])
+        probabilities = service.intent_model.predict_proba(X)[0]
+        if max(probabilities) < 0.15: return "unknown"
+        return service.intent_model.predict(X)[0]
+
+    def single_pass(message):
+        return service.score_intent_batch([message])[0]
+
+    print(f"Intent scoring, {len(messages)} messages:")
+    before = time_per_call(legacy, messages)
+    after = time_per_call(single_pass, messages)
+    report("predict_proba + predict", before)
+    report("single pass (top-k)", after)
+    print(f"  speedup: {before.mean() / after.mean():.2f}x")
+
+
+def bench_intent_engines(args):
+    import pickle
+    from ml.intent_kernel import CompiledIntentScorer
+    base_path = os.path.dirname(__file__)
+    with open(os.path.join(base_path, "model.pkl"), "rb") as f:
+        model = pickle.load(f)
+    with open(os.path.join(base_path, "vectorizer.pkl"), "rb") as f:
+        vectorizer = pickle.load(f)
+    scorer = CompiledIntentScorer()
+    messages = [m.lower() for m in sample_messages(args.iterations)]
+
+    expected = model.predict_proba(vectorizer.transform(messages))
+    actual = scorer.predict_proba(messages)
+    print(f"Intent engines, {len(messages)} messages:")
+    print(f"  max |p_sklearn - p_compiled| = {np.abs(expected - actual).max():.2e}")
+    print(f"  label agreement: {np.mean(expected.argmax(1) == actual.argmax(1)):.2%}")
+
+    report("sklearn transform+proba", time_per_call(lambda m: model.predict_proba(vectorizer.transform([m])), messages))
+    report("compiled kernel", time_per_call(lambda m: scorer.predict_proba([m]), messages))
+
+
+COLD_START = """
+import json, os, resource, sys, time
+os.environ.update(ML_LOAD_MODE="eager", ML_BATCH_WINDOW_MS="0", SENTIMENT_ENGINE=sys.argv[1])
+start = time.perf_counter()
+from ml.ml_service import MLService
+service = MLService()
+ready = time.perf_counter() - start
+service.predict_sentiment("the delivery was late and the box was damaged")
+print(json.dumps({
+    "engine": service.health()["sentiment_engine"],
+    "cold_start_s": ready,
+    "first_prediction_s": time.perf_counter() - start,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}))
+"""
+
+
+def bench_sentiment_engines(args):
+    import json
+    import subprocess
+    import sys
+    from ml.sentiment_numpy import NumpySentimentModel, pad_sequences
+
+    root_path = os.path.join(os.path.dirname(__file__), "..")
+    print("Cold start (fresh process, eager load):")
+    for engine in ("keras", "numpy"):
+        out = subprocess.run(
+            [sys.executable, "-c", COLD_START, engine],
+            cwd=root_path, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(out)
+        print(
+            f"  {engine:<6} ready {result['cold_start_s']:6.2f} s   first prediction "
+            f"{result['first_prediction_s']:6.2f} s   max RSS {result['max_rss_mb']:7.1f} MB"
+        )
+
+    from keras.models import load_model
+    keras_model = load_model(os.path.join(root_path, "sentiment_model.keras"))
+    numpy_model = NumpySentimentModel()
+    tokenizer = numpy_model.tokenizer()
+    X = pad_sequences(tokenizer.texts_to_sequences(sample_messages(args.iterations)), 100)
+
+    diff = np.abs(keras_model.predict(X, verbose=0) - numpy_model.predict(X)).max()
+    print(f"Forward pass, {len(X)} messages (max |diff| {diff:.2e}):")
+    rows = list(range(len(X)))
+    report("keras, 1 message", time_per_call(lambda i: keras_model.predict(X[i:i + 1], verbose=0), rows, repeat=1))
+    report("numpy, 1 message", time_per_call(lambda i: numpy_model.predict(X[i:i + 1]), rows, repeat=1))
+    batches = list(range(0, len(X) - 63, 64)) or [0]
+    report("keras, batch of 64", time_per_call(lambda i: keras_model.predict(X[i:i + 64], verbose=0), batches))
+    report("numpy, batch of 64", time_per_call(lambda i: numpy_model.predict(X[i:i + 64]), batches))
+
+
+def bench_sentiment_lengths(args):
+    os.environ.update(ML_LOAD_MODE="eager", SENTIMENT_ENGINE=args.engine)
+    from ml.ml_service import MLService
+    service = MLService()
+    if not service.sentiment_ready:
+        print("⚠️ Sentiment model not available")
+        return
+    texts, source = interaction_texts(args.iterations)
+    _, lengths = service.sentiment_tokenizer.encode([t.lower() for t in texts], 100)
+    print(f"Token lengths of {len(texts)} messages from {source}:")
+    print(f"  p50 {np.percentile(lengths, 50):.0f}   p90 {np.percentile(lengths, 90):.0f}   max {lengths.max()}")
+    for bucket in service.sentiment_buckets:
+        share = np.mean([service._sentiment_bucket(n) == bucket for n in lengths if n > 0])
+        print(f"  bucket {bucket:>3}: {share:.1%}")
+    if not service.sentiment_masked:
+        print("⚠️ Model does not mask padding (retrain with train_keras.py); buckets are disabled")
+
+    buckets = service.sentiment_buckets
+    print(f"Sentiment latency ({service.sentiment_engine} engine):")
+    service.sentiment_buckets = [100]
+    fixed = time_per_call(lambda m: service.predict_sentiment_batch([m]), texts, repeat=1)
+    fixed_batch = time_per_call(service.predict_sentiment_batch, [texts[i:i + 64] for i in range(0, len(texts), 64)])
+    service.sentiment_buckets = buckets
+    bucketed = time_per_call(lambda m: service.predict_sentiment_batch([m]), texts, repeat=1)
+    bucketed_batch = time_per_call(service.predict_sentiment_batch, [texts[i:i + 64] for i in range(0, len(texts), 64)])
+    report("fixed 100, 1 message", fixed)
+    report("bucketed, 1 message", bucketed)
+    report("fixed 100, batch of 64", fixed_batch)
+    report("bucketed, batch of 64", bucketed_batch)
+    print(f"  speedup: {fixed.mean() / bucketed.mean():.2f}x per message, "
+          f"{fixed_batch.mean() / bucketed_batch.mean():.2f}x per batch")
+
+
+class StandInOrders:
+    """In-memory orders collection with a fixed per-query latency, used when mongomock is missing."""
+    def __init__(self, orders, latency_ms):
+        self.orders = {o["orderNumber"]: o for o in orders}
+        self.latency = latency_ms / 1000.0
+
+    def find_one(self, query, projection=None):
+        time.sleep(self.latency)
+        order = self.orders.get(query["orderNumber"])
+        if order and projection:
+            order = {k: v for k, v in order.items() if projection.get(k)}
+        return order
+
+    def create_index(self, key):
+        pass
+
+
+def bench_orders(args):
+    from ml.order_lookup import OrderLookup
+
+    rng = random.Random(42)
+    orders = [
+        {"orderNumber": n, "status": "Shipped", "items": ["Matte Lipstick", "Organic Shampoo"],
+         "total": 42.5, "customerName": "Test", "address": "1 Main St", "orderDate": "2024-01-01"}
+        for n in range(10000, 12000)
+    ]
+    try:
+        import mongomock
+        collection = mongomock.MongoClient().db.orders
+        collection.insert_many(orders)
+        source = "mongomock"
+    except ImportError:
+        collection = StandInOrders(orders, args.latency_ms)
+        source = f"stand-in ({args.latency_ms} ms/query)"
+
+    # Skewed traffic: a few hot orders, plus ~10% lookups of numbers that don't exist
+    hot = [rng.randint(10000, 11999) for _ in range(50)]
+    missing = [rng.randint(90000, 99999) for _ in range(20)]
+    lookups = [
+        rng.choice(missing) if rng.random() < 0.1
+        else rng.choice(hot) if rng.random() < 0.8
+        else rng.randint(10000, 11999)
+        for _ in range(args.iterations)
+    ]
+
+    def uncached(order_id):
+        return collection.find_one({"orderNumber": order_id})
+
+    lookup = OrderLookup(collection)
+    lookup.ensure_index()
+    print(f"Order lookups, {len(lookups)} requests against {source}:")
+    report("find_one (no cache)", time_per_call(uncached, lookups, repeat=1))
+    report("OrderLookup", time_per_call(lookup.get_details, lookups, repeat=1))
+    print(f"  cache: {lookup.stats()}")
+
+
+def synthetic_rules(n, seed=42):
+    """`n` response rules over product/category names plus made-up keywords, spread across the intents."""
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocab = sorted({p.lower() for p in products} | {c.lower() for c in categories})
+    vocab += ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(2 * n)]
+    vocab = [w for w in vocab if not "order".startswith(w)]
+    intents = sorted(templates)
+    return [
+        {"intent": rng.choice(intents), "keywords": rng.sample(vocab, 2), "reply": f"rule {i}"}
+        for i in range(n)
+    ]
+
+
+def bench_rules(args):
+    import re
+    from ml.response_rules import ResponseRules
+    from ml.entities import EntityExtractor
+
+    rules = synthetic_rules(args.rules)
+    messages = sample_messages(args.iterations)
+    intents = sorted(templates)
+    rng = random.Random(7)
+    pairs = [(rng.choice(intents), m) for m in messages]
+
+    def keyword_chain(pair):
+        # The previous shape: substring checks rule by rule, then separate order-number regexes
+        intent, message = pair
+        lower_msg = message.lower()
+        reply = None
+        for rule in rules:
+            if rule["intent"] == intent and any(k in lower_msg for k in rule["keywords"]):
+                reply = rule["reply"]
+                break
+        order_id = None
+        if intent == "get_order":
+            m = re.search(r'order\s*#?\s*(\d+)', lower_msg)
+            if m:
+                order_id = int(m.group(1))
+            else:
+                nums = re.findall(r'\b\d{5,}\b', lower_msg)
+                if nums:
+                    order_id = int(nums[0])
+        return reply, order_id
+
+    start = time.perf_counter()
+    compiled = ResponseRules(rules)
+    extractor = EntityExtractor(keywords=compiled.keywords)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    def dispatch(pair):
+        intent, message = pair
+        entities, keywords = extractor.scan(message)
+        return compiled.reply_for(intent, keywords), entities["order_id"] if intent == "get_order" else None
+
+    mismatches = sum(keyword_chain(p) != dispatch(p) for p in pairs)
+    print(f"Response rules: {len(rules)} rules, {len(pairs)} messages (compiled in {compile_ms:.1f} ms, "
+          f"{mismatches} mismatches):")
+    report("keyword if/elif chain", time_per_call(keyword_chain, pairs))
+    report("EntityExtractor + rules", time_per_call(dispatch, pairs))
+
+
+def write_source_file(path, header, make_row, target_bytes, seed):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(header) + "\n")
+        written = 0
+        while written < target_bytes:
+            lines = "".join(make_row(rng) for _ in range(10000))
+            f.write(lines)
+            written += len(lines)
+
+
+def bench_sources(args):
+    import csv
+    import shutil
+    import tempfile
+    from ml.data import generate_training_csv as gtc
+
+    target = int(args.source_mb * 1024 * 1024)
+    words = ["cotton", "silk", "blue", "shirt", "matte", "serum", "late", "great", "slow", "box"]
+    specs = {
+        gtc.FILE_SOURCES[0][1]: (["Item", "Price"], lambda r: f"Book {r.randint(1, 10**9)},{r.randint(1, 999)}\n"),
+        gtc.FILE_SOURCES[1][1]: (["product_name", "brand"], lambda r: f"Serum {r.randint(1, 10**9)},acme\n"),
+        gtc.FILE_SOURCES[2][1]: (["BrandName", "Deatils"],
+                                 lambda r: f"brand{r.randint(1, 10**6)},{' '.join(r.choices(words, k=4))}\n"),
+        gtc.FILE_SOURCES[3][1]: (["Order ID", "Amount"], lambda r: f"ORD{r.randint(1, 10**9)},{r.randint(1, 999)}\n"),
+        gtc.FILE_SOURCES[4][1]: (["Reviews", "Rating"],
+                                 lambda r: f"{' '.join(r.choices(words, k=8))},{r.randint(1, 5)}\n"),
+    }
+    tmp = tempfile.mkdtemp(prefix="sources-bench-")
+    try:
+        print(f"Writing {len(specs)} source files of {args.source_mb:g} MB to {tmp}...")
+        for i, (name, (header, make_row)) in enumerate(specs.items()):
+            write_source_file(os.path.join(tmp, name), header, make_row, target, seed=i)
+
+        def materialize_all():
+            # The previous approach: list(reader) + shuffle of every file, one after another
+            rng = random.Random(42)
+            for name in specs:
+                with open(os.path.join(tmp, name), encoding="utf-8", errors="ignore") as f:
+                    rows = list(csv.DictReader(f))
+                rng.shuffle(rows)
+
+        def timed(label, fn):
+            start = time.perf_counter()
+            result = fn()
+            print(f"  {label:<36} {time.perf_counter() - start:8.2f} s")
+            return result
+
+        print(f"Aggregating {len(specs)} x {args.source_mb:g} MB (no cache):")
+        timed("list + shuffle, sequential (before)", materialize_all)
+        serial, _ = timed("streamed reservoir, 1 process",
+                          lambda: gtc.aggregate([], use_cache=False, workers=1, data_dir=tmp))
+        parallel, _ = timed(f"streamed reservoir, {min(len(specs), os.cpu_count() or 1)} processes",
+                            lambda: gtc.aggregate([], use_cache=False, data_dir=tmp))
+        print(f"  identical output: {serial == parallel} ({len(parallel)} rows)")
+    finally:
+        shutil.rmtree(tmp)
+
+
+def bench_normalize(args):
+    import re
+    from ml import text_normalize as tn
+
+    # Template messages plus punctuation, digits and non-ASCII letters the filters must handle
+    rng = random.Random(3)
+    extras = ["!!", "?", " 😊", "  ", "\t", "Ünïcödé", "İ", "K", "ß", " #12345", "\n"]
+    base = [m + rng.choice(extras) + m.upper()[:rng.randint(0, 20)] for m in sample_messages(10000)]
+    messages = (base * (args.messages // len(base) + 1))[:args.messages]
+
+    cases = [
+        ("sentiment", lambda m: re.sub(r"[^a-zA-Z ]", "", m.lower()),
+         tn.normalize_sentiment, tn.normalize_sentiment_batch),
+        ("whitespace", lambda m: re.sub(r'\s+', ' ', m).strip(),
+         tn.collapse_whitespace, tn.collapse_whitespace_batch),
+        ("single line", lambda m: m.replace("\n", " ").replace("\r", " ").strip(),
+         tn.single_line, tn.single_line_batch),
+    ]
+    print(f"Text normalization on {len(messages)} messages (seconds, best of 3):")
+    for name, legacy, single, batch in cases:
+        timings = []
+        for fn in (lambda: [legacy(m) for m in messages], lambda: [single(m) for m in messages],
+                   lambda: batch(messages)):
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                out = fn()
+                best = min(best, time.perf_counter() - start)
+            timings.append((best, out))
+        identical = timings[0][1] == timings[1][1] == timings[2][1]
+        print(f"  {name:<12} before {timings[0][0]:6.2f}   per call {timings[1][0]:6.2f}   "
+              f"batch {timings[2][0]:6.2f}   ({timings[0][0] / timings[2][0]:.1f}x, identical: {identical})")
+
+
+def bench_tokenize(args):
+    import pickle
+    from keras.preprocessing.sequence import pad_sequences as keras_pad
+    from ml.sentiment_numpy import TokenLookup
+    from ml.text_normalize import normalize_sentiment_batch
+
+    with open(os.path.join(os.path.dirname(__file__), "tokenizer.pkl"), "rb") as f:
+        keras_tokenizer = pickle.load(f)
+    lookup = TokenLookup.from_keras(keras_tokenizer)
+    texts = normalize_sentiment_batch(sample_messages(args.iterations))
+    # Unknown words and an empty message must come out the same too
+    texts[:3] = ["qwertyuiop zxcvb great", "", "   "]
+
+    def keras_encode(batch):
+        return keras_pad(keras_tokenizer.texts_to_sequences(batch), maxlen=100)
+
+    X, lengths = lookup.encode(texts, 100, normalized=True)
+    identical = np.array_equal(keras_encode(texts), X) and \
+        lengths.tolist() == [len(s) for s in keras_tokenizer.texts_to_sequences(texts)]
+    print(f"Tokenize + pad to 100, {len(texts)} messages, {len(lookup.words)} words "
+          f"({lookup.words.nbytes / 1024:.0f} KB sorted array, identical: {identical}):")
+    report("keras Tokenizer, 1 message", time_per_call(lambda m: keras_encode([m]), texts))
+    report("TokenLookup, 1 message", time_per_call(lambda m: lookup.encode([m], 100, normalized=True), texts))
+    batches = [texts[i:i + 64] for i in range(0, len(texts), 64)]
+    report("keras Tokenizer, batch of 64", time_per_call(keras_encode, batches))
+    report("TokenLookup, batch of 64", time_per_call(lambda b: lookup.encode(b, 100, normalized=True), batches))
+
+
+def bench_cascade(args):
+    import csv
+    from collections import Counter
+    os.environ.update(ML_LOAD_MODE="eager")
+    from ml.ml_service import MLService
+
+    service = MLService()
+    if not service.sentiment_ready:
+        print("⚠️ Sentiment model not available; the cascade would only replace VADER with VADER")
+        return
+    service.cascade_vader, service.cascade_intent = args.vader_threshold, args.intent_confidence
+
+    # Labelled messages: the aggregated training data (text, intent, sentiment)
+    path = os.path.join(os.path.dirname(__file__), "chatbot_training_data.csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [r for r in csv.DictReader(f) if r.get("text") and r.get("sentiment")]
+    rows = random.Random(5).sample(rows, min(args.iterations, len(rows)))
+    texts = [r["text"] for r in rows]
+    batches = [texts[i:i + 64] for i in range(0, len(texts), 64)]
+
+    def run(cascade):
+        service.cascade = cascade
+        service.sentiment_tiers.clear()
+        start = time.perf_counter()
+        results = [r for batch in batches for r in service._analyze_batch(batch)]
+        per_message = (time.perf_counter() - start) / len(texts) * 1e6
+        return results, per_message, Counter(service.sentiment_tiers)
+
+    def guardrail(result):
+        return result["sentiment"] == "negative" and result["intent"] == "positive_feedback"
+
+    full, full_us, _ = run(False)
+    cascaded, cascade_us, tiers = run(True)
+    print(f"Sentiment cascade on {len(texts)} labelled messages (VADER |compound| >= {args.vader_threshold}, "
+          f"intent confidence >= {args.intent_confidence}, {service.sentiment_engine} engine):")
+    total = sum(tiers.values())
+    for tier, count in tiers.most_common():
+        print(f"  {tier:<15} {count / total:6.1%}")
+    for name, results, per_message in (("full", full, full_us), ("cascade", cascaded, cascade_us)):
+        accuracy = np.mean([r["sentiment"] == row["sentiment"] for r, row in zip(results, rows)])
+        print(f"  {name:<8} sentiment accuracy {accuracy:6.1%}   {per_message:8.1f} µs/message")
+    agreement = np.mean([a["sentiment"] == b["sentiment"] for a, b in zip(full, cascaded)])
+    flips = sum(guardrail(a) != guardrail(b) for a, b in zip(full, cascaded))
+    print(f"  agreement with the full path {agreement:.1%}   guardrail decisions changed: {flips}")
+
+
+BENCHMARKS = {
+    "intent": bench_intent,
+    "intent-engines": bench_intent_engines,
+    "sentiment-engines": bench_sentiment_engines,
+    "sentiment-lengths": bench_sentiment_lengths,
+    "orders": bench_orders,
+    "rules": bench_rules,
+    "sources": bench_sources,
+    "normalize": bench_normalize,
+    "tokenize": bench_tokenize,
+    "cascade": bench_cascade,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ML service micro-benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--engine", choices=["keras", "numpy"], default="numpy",
+                        help="sentiment engine for sentiment-lengths")
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="simulated Mongo latency for the orders stand-in")
+    parser.add_argument("--rules", type=int, default=500, help="number of synthetic response rules")
+    parser.add_argument("--source-mb", type=float, default=1024, help="size of each generated source CSV")
+    parser.add_argument("--messages", type=int, default=1000000, help="messages for the normalize benchmark")
+    parser.add_argument("--vader-threshold", type=float, default=0.5,
+                        help="cascade: |VADER compound| that skips the LSTM")
+    parser.add_argument("--intent-confidence", type=float, default=0.8,
+                        help="cascade: intent confidence that skips the LSTM")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
@@ -175,22 +175,29 @@ templates = {
     ]
 }
 
-def generate():
-    output_file = "chatbot_intents.csv"
+SAMPLES_PER_INTENT = 400
+
+def generate_rows(rng=random):
+    """(text, intent) samples rendered from the templates; pass a seeded random.Random for repeatable output."""
+    rows = []
+    # We increase the number of samples by looping more times for each intent
+    for intent, sents in templates.items():
+        # Generate 400 samples per intent to ensure they DOMINATE ALL NOISE
+        for _ in range(SAMPLES_PER_INTENT):
+            s = rng.choice(sents)
+            text = s.format(
+                product=rng.choice(products), 
+                category=rng.choice(categories),
+                oid=str(rng.randint(10000, 99999))
+            )
+            rows.append((text, intent))
+    return rows
+
+def generate(output_file="chatbot_intents.csv"):
     with open(output_file, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(["text", "intent"])
-        # We increase the number of samples by looping more times for each intent
-        for intent, sents in templates.items():
-            # Generate 400 samples per intent to ensure they DOMINATE ALL NOISE
-            for _ in range(400):
-                s = random.choice(sents)
-                text = s.format(
-                    product=random.choice(products), 
-                    category=random.choice(categories),
-                    oid=str(random.randint(10000, 99999))
-                )
-                writer.writerow([text, intent])
+        writer.writerows(generate_rows())
     print(f"Generated {output_file} with {len(templates)} intents and balanced samples.")
 
 if __name__ == "__main__":
@@ -1,7 +1,8 @@
 import csv
 import os
 import random
-import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
 # --- Configuration ---
 OUTPUT_FILE = "../../chatbot_training_data.csv" # Relative to ml/data if run from there, or correct path
@@ -10,20 +11,14 @@ OUTPUT_FILE = "../../chatbot_training_data.csv" # Relative to ml/data if run fro
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_PATH = os.path.join(BASE_DIR, "../chatbot_training_data.csv")
 
-ALLOWED_INTENTS = {
-    "greeting", "thanks", "goodbye", "positive_feedback",
-    "get_order", "shipping_info", "payment_info", "account_issue",
-    "promos_discounts", "stock_info", "sizing_help",
-    "refund", "product_issue", "wrong_order",
-    "cancel_order", "change_order", "change_shipping_address",
-    "track_refund", "request_invoice", "missing_item",
-    "expedited_shipping", "shipping_restrictions",
-    "delete_account", "update_account", "newsletter_subscription", "privacy_policy",
-    "payment_failed", "currency_support", "gift_card",
-    "restock_alert", "product_care", "warranty_info", "authenticity",
-    "store_hours", "contact_support", "physical_location", "loyalty_program",
-    "careers", "gift_wrapping", "product_catalog", "price_query", "unknown"
-}
+try:
+    from ml import intents, text_normalize
+except ImportError:  # run as a script from ml/data
+    sys.path.insert(0, os.path.dirname(os.path.dirname(BASE_DIR)))
+    from ml import intents, text_normalize
+from ml.intents import ALLOWED_INTENTS, LABEL_MAP
+from ml.pipeline import cache_load, cache_store, file_digest, stage_key
+from ml.text_normalize import collapse_whitespace
 
 ALLOWED_SENTIMENTS = {"positive", "neutral", "negative"}
 
@@ -36,8 +31,7 @@ INTENT_CAP = 1000
 def clean_text(text):
     if not text:
         return ""
-    text = re.sub(r'\s+', ' ', str(text)).strip()
-    return text
+    return collapse_whitespace(str(text))
 
 def get_sentiment_for_rating(rating):
     try:
@@ -58,14 +52,14 @@ def infer_sentiment_from_intent(intent, text=""):
         return "negative"
     return "neutral"
 
-def write_row(writer, text, intent, sentiment, stats):
+def write_row(rows, text, intent, sentiment, stats):
     if not text or len(text) < 2: return False
     if intent not in ALLOWED_INTENTS: return False
     if stats[intent] >= INTENT_CAP: return False # ENFORCE CAP
     
     if sentiment not in ALLOWED_SENTIMENTS: sentiment = "neutral"
     
-    writer.writerow({
+    rows.append({
         "text": text,
         "intent": intent,
         "sentiment": sentiment
@@ -75,156 +69,247 @@ def write_row(writer, text, intent, sentiment, stats):
 
 # --- Main Processing ---
 
-def generate_csv():
-    print(f"Generating {OUTPUT_PATH}...")
-    
-    records_written = 0
-    stats = {i: 0 for i in ALLOWED_INTENTS}
+def new_stats():
+    return {i: 0 for i in ALLOWED_INTENTS}
 
-    with open(OUTPUT_PATH, mode='w', newline='', encoding='utf-8') as outfile:
-        fieldnames = ["text", "intent", "sentiment"]
-        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-        writer.writeheader()
+def read_source(fname):
+    """Streams the rows of a source CSV as dicts; nothing is materialized."""
+    with open(fname, 'r', encoding='utf-8', errors='ignore') as f:
+        yield from csv.DictReader(f)
+
+def read_columns(fname, *columns):
+    """
+    Streams only the named columns of a source CSV as tuples (None where a
+    column or cell is missing). Skips building a dict per row, which is most
+    of csv.DictReader's cost on large files.
+    """
+    with open(fname, 'r', encoding='utf-8', errors='ignore') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        # Missing columns read index -1, the None appended to every row
+        index = [header.index(c) if c in header else -1 for c in columns]
+        width = len(header)
+        for row in reader:
+            if len(row) < width:
+                row.extend([None] * (width - len(row)))
+            row.append(None)
+            yield tuple(row[i] for i in index)
+
+def reservoir_sample(items, k, rng):
+    """k items drawn uniformly from a stream of unknown length (Algorithm R), in random order."""
+    sample = []
+    for n, item in enumerate(items):
+        if n < k:
+            sample.append(item)
+        else:
+            j = rng.randrange(n + 1)
+            if j < k:
+                sample[j] = item
+    rng.shuffle(sample)
+    return sample
+
+# --- Sources ---
+# Each source turns one dataset into candidate rows on its own (own sample, own
+# LIMIT_PER_SOURCE_TYPE and INTENT_CAP), so its output depends only on the file
+# and the parameters and can be cached. Every eligible record yields at least
+# one row, so a reservoir of LIMIT_PER_SOURCE_TYPE records is enough and the
+# file is streamed once instead of loaded and shuffled. merge() applies the
+# global INTENT_CAP.
+
+def synthetic_source(records, rng):
+    """Chatbot Intents (Synthetic - PRIORITY): (text, intent) pairs."""
+    rows, stats = [], new_stats()
+    records = list(records)
+    rng.shuffle(records) # Variety
+    for text, intent in records:
+        intent = LABEL_MAP.get(intent, intent)
+        write_row(rows, clean_text(text), intent, infer_sentiment_from_intent(intent), stats)
+    return rows
+
+def books_source(fname, rng):
+    """Books (Flipkart) -> stock_info, price_query"""
+    rows, stats = [], new_stats()
+    items = (item for (item,) in read_columns(fname, 'Item'))
+    items = reservoir_sample((i for i in items if i and i.strip()), LIMIT_PER_SOURCE_TYPE, rng)
+    for item in items:
+        item = clean_text(item)
+        if not item: continue
+        write_row(rows, f"is {item} book in stock?", "stock_info", "neutral", stats)
+        write_row(rows, f"price of book {item}", "price_query", "neutral", stats)
+        if len(rows) >= LIMIT_PER_SOURCE_TYPE: break
+    return rows
+
+def cosmetics_source(fname, rng):
+    """Cosmetics -> stock_info, restock_alert"""
+    rows, stats = [], new_stats()
+    prods = (prod for (prod,) in read_columns(fname, 'product_name'))
+    prods = reservoir_sample((p for p in prods if p and p.strip()), LIMIT_PER_SOURCE_TYPE, rng)
+    for prod in prods:
+        prod = clean_text(prod)
+        if not prod: continue
+        write_row(rows, f"is {prod} available?", "stock_info", "neutral", stats)
+        write_row(rows, f"restock {prod}?", "restock_alert", "neutral", stats)
+        if len(rows) >= LIMIT_PER_SOURCE_TYPE: break
+    return rows
+
+def fashion_source(fname, rng):
+    """Fashion -> sizing_help, product_care"""
+    rows, stats = [], new_stats()
+    eligible = (r for r in read_columns(fname, 'BrandName', 'Deatils')
+                if (r[0] and r[0].strip()) or (r[1] and r[1].strip()))
+    for brand, details in reservoir_sample(eligible, LIMIT_PER_SOURCE_TYPE, rng):
+        brand = clean_text(brand)
+        details = clean_text(details)
+        if brand:
+            write_row(rows, f"sizing for {brand}", "sizing_help", "neutral", stats)
+        if details:
+            write_row(rows, f"how to wash {details}", "product_care", "neutral", stats)
+        if len(rows) >= LIMIT_PER_SOURCE_TYPE: break
+    return rows
+
+def sales_source(fname, rng):
+    """Sales Data -> get_order"""
+    rows, stats = [], new_stats()
+    eligible = (oid for (oid,) in read_columns(fname, 'Order ID') if oid and oid.strip())
+    for oid in reservoir_sample(eligible, LIMIT_PER_SOURCE_TYPE, rng):
+        oid = clean_text(oid)
+        if oid:
+            write_row(rows, f"order status {oid}", "get_order", "neutral", stats)
+        if len(rows) >= LIMIT_PER_SOURCE_TYPE: break
+    return rows
+
+def reviews_source(fname, rng):
+    """Reviews -> positive_feedback, product_issue, shipping_info"""
+    rows, stats = [], new_stats()
+
+    def labelled(stream):
+        # Neutral ratings produce no row, so they are dropped before sampling
+        for reviews, review, lower_reviews, rating_val in stream:
+            text_val = reviews or review or lower_reviews
+            if text_val and rating_val:
+                sentiment = get_sentiment_for_rating(rating_val)
+                if sentiment != "neutral" and len(text_val.strip()) >= 2:
+                    yield text_val, sentiment
+
+    reviews = labelled(read_columns(fname, 'Reviews', 'Review', 'reviews', 'Rating'))
+    for text_val, sentiment in reservoir_sample(reviews, LIMIT_PER_SOURCE_TYPE, rng):
+        text = clean_text(text_val)
+        if sentiment == "positive":
+            write_row(rows, text, "positive_feedback", "positive", stats)
+        else:
+            lower_text = text.lower()
+            if any(k in lower_text for k in ["late", "delay", "time", "slow", "arrive"]):
+                write_row(rows, text, "shipping_info", "negative", stats)
+            else:
+                write_row(rows, text, "product_issue", "negative", stats)
+        if len(rows) >= LIMIT_PER_SOURCE_TYPE: break
+    return rows
+
+def contributions_source(fname, rng):
+    """User Contributions (Continuous Learning), in logged order"""
+    rows, stats = [], new_stats()
+    for text, intent, sentiment in read_columns(fname, 'text', 'intent', 'sentiment'):
+        write_row(rows, clean_text(text), intent, sentiment, stats)
+    return rows
+
+# Merge priority order: earlier sources win when INTENT_CAP is reached
+FILE_SOURCES = [
+    ("books", "Best Selling Books- Buy Products Online at Best Price in India - All Categories _ Flipkart.com.csv", books_source),
+    ("cosmetics", "E-commerce  cosmetic dataset.csv", cosmetics_source),
+    ("fashion", "FashionDataset.csv", fashion_source),
+    ("sales", "Ecommerce_Sales_Data_2024_2025.csv", sales_source),
+    ("reviews", "Fast Delivery Agent Reviews.csv", reviews_source),
+    ("contributions", "user_contributions.csv", contributions_source),
+]
+
+SOURCE_FUNCTIONS = {name: fn for name, _, fn in FILE_SOURCES}
 
-        # 1. Chatbot Intents (Synthetic - PRIORITY)
-        fname = os.path.join(BASE_DIR, "chatbot_intents.csv")
+# --- Source cache ---
+# Processed rows per source, keyed by the source file's hash plus everything
+# that shapes the output (limits, seed, this file's, intents' and text_normalize's code).
+
+CACHE_DIR = os.path.join(BASE_DIR, "..", ".pipeline_cache", "sources")
+SEED = 42
+
+def source_cache_key(name, fname, seed):
+    return stage_key(name, file_digest(fname), file_digest(os.path.abspath(__file__)),
+                     file_digest(intents.__file__), file_digest(text_normalize.__file__),
+                     LIMIT_PER_SOURCE_TYPE, INTENT_CAP, seed)
+
+def load_cached_source(name, key):
+    columns = cache_load(name, key, CACHE_DIR)
+    if columns is None:
+        return None
+    texts, intents, sentiments = columns
+    return [{"text": t, "intent": i, "sentiment": s} for t, i, s in zip(texts, intents, sentiments)]
+
+def store_cached_source(name, key, rows):
+    # Column lists pickle much smaller than a list of dicts
+    columns = ([r["text"] for r in rows], [r["intent"] for r in rows], [r["sentiment"] for r in rows])
+    cache_store(name, key, columns, CACHE_DIR)
+
+def process_source(name, fname, seed=SEED, use_cache=True):
+    """Rows of one file source, from cache when the file is unchanged. Runs in a pool worker."""
+    fn = SOURCE_FUNCTIONS[name]
+    if not use_cache:
+        return fn(fname, random.Random(f"{seed}:{name}"))
+    key = source_cache_key(name, fname, seed)
+    rows = load_cached_source(name, key)
+    if rows is not None:
+        print(f"Reusing cached {name} rows ({len(rows)})")
+        return rows
+    print(f"Processing {fname}...")
+    rows = fn(fname, random.Random(f"{seed}:{name}"))
+    store_cached_source(name, key, rows)
+    return rows
+
+def merge(source_rows):
+    """Concatenates per-source rows in priority order, enforcing the global INTENT_CAP."""
+    rows, stats = [], new_stats()
+    for candidates in source_rows:
+        for row in candidates:
+            write_row(rows, row["text"], row["intent"], row["sentiment"], stats)
+    return rows, stats
+
+def aggregate(synthetic_rows=None, seed=SEED, use_cache=True, workers=None, data_dir=BASE_DIR):
+    """
+    Combines the synthetic intents, the public datasets in ml/data and the
+    user contributions into training rows ({"text", "intent", "sentiment"}),
+    enforcing LIMIT_PER_SOURCE_TYPE and INTENT_CAP. Returns (rows, stats).
+    Only sources whose file changed since the last run are reprocessed, each
+    in its own worker process (`workers`, default: one per source up to the
+    CPU count; 1 = in this process). The merge order is fixed, so the result
+    does not depend on which worker finishes first.
+    """
+    # In-memory rows from generate_intents.generate_rows() (pipeline), else chatbot_intents.csv
+    if synthetic_rows is None:
+        fname = os.path.join(data_dir, "chatbot_intents.csv")
         if os.path.exists(fname):
             print(f"Processing synthetic {fname}...")
-            with open(fname, 'r', encoding='utf-8', errors='ignore') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-                random.shuffle(rows) # Variety
-                for row in rows:
-                    text = clean_text(row.get('text'))
-                    intent = row.get('intent')
-                    label_map = {
-                        "refund_request": "refund",
-                        "order_tracking": "get_order",
-                        "availability_check": "stock_info",
-                        "delivery_query": "shipping_info"
-                    }
-                    intent = label_map.get(intent, intent)
-                    if write_row(writer, text, intent, infer_sentiment_from_intent(intent), stats):
-                        records_written += 1
-
-        # 2. Books (Flipkart) -> stock_info, price_query
-        fname = os.path.join(BASE_DIR, "Best Selling Books- Buy Products Online at Best Price in India - All Categories _ Flipkart.com.csv")
-        if os.path.exists(fname):
-            print(f"Processing {fname}...")
-            count = 0
-            with open(fname, 'r', encoding='utf-8', errors='ignore') as f:
-                reader = csv.DictReader(f)
-                items = [row.get('Item') for row in reader if row.get('Item')]
-                random.shuffle(items)
-                for item in items:
-                    item = clean_text(item)
-                    if not item: continue
-                    
-                    if write_row(writer, f"is {item} book in stock?", "stock_info", "neutral", stats):
-                        count += 1
-                    if write_row(writer, f"price of book {item}", "price_query", "neutral", stats):
-                        count += 1
-                    
-                    if count >= LIMIT_PER_SOURCE_TYPE: break
-            records_written += count
-
-        # 3. Cosmetics -> stock_info, restock_alert
-        fname = os.path.join(BASE_DIR, "E-commerce  cosmetic dataset.csv")
-        if os.path.exists(fname):
-            print(f"Processing {fname}...")
-            count = 0
-            with open(fname, 'r', encoding='utf-8', errors='ignore') as f:
-                reader = csv.DictReader(f)
-                prods = [row.get('product_name') for row in reader if row.get('product_name')]
-                random.shuffle(prods)
-                for prod in prods:
-                    prod = clean_text(prod)
-                    if not prod: continue
-                    if write_row(writer, f"is {prod} available?", "stock_info", "neutral", stats):
-                        count += 1
-                    if write_row(writer, f"restock {prod}?", "restock_alert", "neutral", stats):
-                        count += 1
-                    if count >= LIMIT_PER_SOURCE_TYPE: break
-            records_written += count
-
-        # 4. Fashion -> sizing_help, product_care
-        fname = os.path.join(BASE_DIR, "FashionDataset.csv")
-        if os.path.exists(fname):
-            print(f"Processing {fname}...")
-            count = 0
-            with open(fname, 'r', encoding='utf-8', errors='ignore') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-                random.shuffle(rows)
-                for row in rows:
-                    brand = clean_text(row.get('BrandName'))
-                    details = clean_text(row.get('Deatils'))
-                    if brand and write_row(writer, f"sizing for {brand}", "sizing_help", "neutral", stats):
-                        count += 1
-                    if details and write_row(writer, f"how to wash {details}", "product_care", "neutral", stats):
-                        count += 1
-                    if count >= LIMIT_PER_SOURCE_TYPE: break
-            records_written += count
-
-        # 5. Sales Data -> get_order
-        fname = os.path.join(BASE_DIR, "Ecommerce_Sales_Data_2024_2025.csv")
-        if os.path.exists(fname):
-            print(f"Processing {fname}...")
-            count = 0
-            with open(fname, 'r', encoding='utf-8', errors='ignore') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-                random.shuffle(rows)
-                for row in rows:
-                    oid = clean_text(row.get('Order ID'))
-                    if oid and write_row(writer, f"order status {oid}", "get_order", "neutral", stats):
-                        count += 1
-                    if count >= LIMIT_PER_SOURCE_TYPE: break
-            records_written += count
-
-        # 6. Reviews -> positive_feedback, product_issue, shipping_info
-        fname = os.path.join(BASE_DIR, "Fast Delivery Agent Reviews.csv")
-        if os.path.exists(fname):
-            print(f"Processing {fname}...")
-            count = 0
-            with open(fname, 'r', encoding='utf-8', errors='ignore') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-                random.shuffle(rows)
-                for row in rows:
-                    rating_val = row.get('Rating')
-                    text_val = row.get('Reviews') or row.get('Review') or row.get('reviews')
-                    if text_val and rating_val:
-                        text = clean_text(text_val)
-                        sentiment = get_sentiment_for_rating(rating_val)
-                        if sentiment == "positive":
-                            if write_row(writer, text, "positive_feedback", "positive", stats):
-                                count += 1
-                        elif sentiment == "negative":
-                            lower_text = text.lower()
-                            if any(k in lower_text for k in ["late", "delay", "time", "slow", "arrive"]):
-                                if write_row(writer, text, "shipping_info", "negative", stats):
-                                    count += 1
-                            else:
-                                if write_row(writer, text, "product_issue", "negative", stats):
-                                    count += 1
-                    if count >= LIMIT_PER_SOURCE_TYPE: break
-            records_written += count
-            
-        # 7. User Contributions (Continuous Learning)
-        fname = os.path.join(BASE_DIR, "user_contributions.csv")
-        if os.path.exists(fname):
-            print(f"Processing real user interactions {fname}...")
-            count = 0
-            with open(fname, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    text = clean_text(row.get('text'))
-                    intent = row.get('intent')
-                    sentiment = row.get('sentiment')
-                    if write_row(writer, text, intent, sentiment, stats):
-                        count += 1
-            records_written += count
+            synthetic_rows = [(row.get('text'), row.get('intent')) for row in read_source(fname)]
+    source_rows = [synthetic_source(synthetic_rows or [], random.Random(f"{seed}:synthetic"))]
+
+    jobs = [(name, os.path.join(data_dir, filename)) for name, filename, _ in FILE_SOURCES]
+    jobs = [(name, fname) for name, fname in jobs if os.path.exists(fname)]
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(process_source, name, fname, seed, use_cache) for name, fname in jobs]
+            source_rows += [f.result() for f in futures]
+    else:
+        source_rows += [process_source(name, fname, seed, use_cache) for name, fname in jobs]
+
+    return merge(source_rows)
+
+def generate_csv(output_path=OUTPUT_PATH):
+    print(f"Generating {output_path}...")
+    rows, stats = aggregate()
+    records_written = len(rows)
+
+    with open(output_path, mode='w', newline='', encoding='utf-8') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=["text", "intent", "sentiment"])
+        writer.writeheader()
+        writer.writerows(rows)
 
     print(f"\nDone! Total records written: {records_written}")
     print("Intent Distribution:")
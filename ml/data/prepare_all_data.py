@@ -2,6 +2,11 @@
 import csv
 import os
 import random
+import sys
+
+# Run from ml/data; make the ml package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from ml.text_normalize import single_line
 
 # Output to parent directory (ml/ecommerce_dataset.txt)
 output_file = "../ecommerce_dataset.txt"
@@ -11,7 +16,7 @@ print(f"Generating {output_file} from datasets in {os.getcwd()}...")
 
 def clean_text(text):
     if not text: return ""
-    return text.replace("\n", " ").replace("\r", " ").strip()
+    return single_line(text)
 
 with open(output_file, "w", encoding="utf-8") as outfile:
     
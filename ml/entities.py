@@ -0,0 +1,121 @@
+import re
+
+from ml.data.generate_intents import products, categories
+
+ORDER_REF = r"order\s*#?\s*(?P<order_ref>\d+)"
+LONG_NUMBER = r"\b(?P<number>\d{5,})\b"
+AMOUNT = r"\$\s*(?P<amount>\d+(?:\.\d{1,2})?)|(?<![\w.])(?P<amount_word>\d+(?:\.\d{1,2})?)\s*(?:dollars?|usd|bucks)\b"
+
+LONG_NUMBER_RE = re.compile(LONG_NUMBER)
+
+
+def trie_pattern(words):
+    """Regex alternation factored on common prefixes, so each position is tested character by character."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            # Greedy: the longest term starting here is the one reported
+            return "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class EntityExtractor:
+    """
+    Pulls order numbers, money amounts, product names and categories out of a
+    message with one precompiled regex, run once per message.
+
+    `keywords` are extra terms (the response-rule keywords) reported by scan()
+    from the same pass. They match anywhere in the message, while product and
+    category names must be whole words. Category names also match without
+    their plural "s" ("perfume" -> "perfumes").
+    """
+    def __init__(self, products=products, categories=categories, keywords=()):
+        self.kinds = {}  # lowercased term -> [("product"|"category"|"keyword", canonical name)]
+        for name in products:
+            self._add(name.lower(), "product", name)
+        for name in categories:
+            self._add(name.lower(), "category", name)
+            if name.endswith("s"):
+                self._add(name[:-1].lower(), "category", name)
+        for kw in keywords:
+            self._add(kw.lower(), "keyword", kw.lower())
+
+        for term in self.kinds:
+            if not term or term[0].isdigit() or "order".startswith(term) or re.match(ORDER_REF, term):
+                raise ValueError(f"Term {term!r} would shadow the order number patterns")
+
+        # Only the longest term starting at a position is matched; the shorter terms it starts with are implied
+        self.prefixes = {t: sorted((p for p in self.kinds if t.startswith(p)), key=len) for t in self.kinds}
+        self.pattern = re.compile(
+            f"(?=(?P<term>{trie_pattern(self.kinds)})|{ORDER_REF}|{AMOUNT}|{LONG_NUMBER})"
+        )
+
+    def _add(self, term, kind, name):
+        entries = self.kinds.setdefault(term, [])
+        if (kind, name) not in entries:
+            entries.append((kind, name))
+
+    def scan(self, message):
+        """(entities, keywords): the entities dict returned to clients and the set of rule keywords seen."""
+        text = message.lower()
+        order_ref = None
+        numbers, amounts, found_products, found_categories = [], [], [], []
+        keywords = set()
+
+        for m in self.pattern.finditer(text):
+            pos = m.start()
+            term = m.group("term")
+            if term is not None:
+                starts_word = pos == 0 or not _is_word(text[pos - 1])
+                for prefix in self.prefixes[term]:
+                    end = pos + len(prefix)
+                    whole_word = starts_word and (end == len(text) or not _is_word(text[end]))
+                    for kind, name in self.kinds[prefix]:
+                        if kind == "keyword":
+                            keywords.add(name)
+                        elif whole_word:
+                            (found_products if kind == "product" else found_categories).append(name)
+            elif m.group("order_ref") is not None:
+                if order_ref is None:
+                    order_ref = int(m.group("order_ref"))
+            elif m.group("number") is not None:
+                numbers.append(int(m.group("number")))
+            else:
+                amount = m.group("amount") or m.group("amount_word")
+                amounts.append(float(amount))
+                # "12345 dollars" still counts as a long number, as it would on its own
+                number = LONG_NUMBER_RE.match(text, pos)
+                if m.group("amount_word") is not None and number:
+                    numbers.append(int(number.group("number")))
+
+        entities = {
+            # An explicit "order #N" wins over a bare 5+ digit number
+            "order_id": order_ref if order_ref is not None else (numbers[0] if numbers else None),
+            "amounts": amounts,
+            "products": list(dict.fromkeys(found_products)),
+            "categories": list(dict.fromkeys(found_categories))
+        }
+        return entities, keywords
+
+    def extract(self, message):
+        return self.scan(message)[0]
+
+    def extract_batch(self, messages):
+        return [self.scan(m)[0] for m in messages]
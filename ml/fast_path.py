@@ -0,0 +1,206 @@
+"""
+Exact-match fast path for high-frequency utterances.
+
+Messages like "hi", "thanks" or "track my delivery" make up a large share of
+traffic and always get the same intent. MLService looks every message up in
+one dict, keyed by the lowercased message with whitespace collapsed and edge
+punctuation stripped, and skips the intent model on a hit. Candidate keys
+come from:
+
+    - the placeholder-free templates in ml/data/generate_intents.py, labelled
+      like the training data (LABEL_MAP);
+    - the most frequent messages in user_interactions whose logged intent was
+      consistent, exported to ml/data/fast_path_interactions.json by
+
+        python -m ml.fast_path export [--top 500] [--min-count 5]
+
+A key that maps to two different intents is left out. Templates win over
+logged interactions. When the table is built (at startup and on reload) the
+loaded intent model scores every key once, and keys where it disagrees with
+the label are dropped, so a hit returns exactly what the model would.
+Sentiment is not stored: it always runs through the normal path (keyword
+rules, cascade, LSTM, VADER). Only exact matches are served. Prefix matching
+would misroute messages that open with a greeting ("hi, my order is
+broken"). Coverage, hit rate and agreement with the models:
+
+    python -m ml.fast_path report [--limit 5000]
+"""
+import argparse
+import json
+import os
+from collections import Counter
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+INTERACTIONS_PATH = os.path.join(ML_DIR, "data", "fast_path_interactions.json")
+EDGE_CHARS = " .,!?;:"
+
+
+def fast_path_key(message):
+    return " ".join(message.lower().split()).strip(EDGE_CHARS)
+
+
+def template_entries():
+    """{key: intent} for every template without placeholders."""
+    from ml.data.generate_intents import templates
+    from ml.intents import ALLOWED_INTENTS, LABEL_MAP
+
+    entries, ambiguous = {}, set()
+    for intent, group in templates.items():
+        intent = LABEL_MAP.get(intent, intent)
+        if intent not in ALLOWED_INTENTS:
+            continue
+        for text in group:
+            key = fast_path_key(text)
+            if "{" in text or not key:
+                continue
+            if entries.get(key, intent) != intent:
+                ambiguous.add(key)
+            entries[key] = intent
+    for key in ambiguous:
+        del entries[key]
+    return entries
+
+
+def interaction_entries(path=INTERACTIONS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return {row["text"]: row["intent"] for row in json.load(f)}
+
+
+class FastPath:
+    def __init__(self, entries, dropped=0):
+        self.entries = entries
+        self.dropped = dropped
+        self.lookups = 0
+        self.hits = 0
+
+    @classmethod
+    def build(cls, score_batch, interactions_path=INTERACTIONS_PATH):
+        """
+        Scores every candidate key with score_batch (the intent model, as
+        MLService.score_intent_batch results) and keeps the keys it labels the
+        same way, mapped to that result.
+        """
+        labels = interaction_entries(interactions_path)
+        labels.update(template_entries())
+        keys = list(labels)
+        entries = {}
+        for key, scored in zip(keys, score_batch(keys) if keys else []):
+            if scored["intent"] == labels[key]:
+                entries[key] = scored
+        return cls(entries, dropped=len(keys) - len(entries))
+
+    def lookup_batch(self, messages):
+        """The model's intent result per message, or None where the model has to run."""
+        entries = self.entries
+        hits = [entries.get(fast_path_key(m)) if m else None for m in messages]
+        self.lookups += len(messages)
+        self.hits += sum(hit is not None for hit in hits)
+        return hits
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "dropped": self.dropped,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else None
+        }
+
+
+def interactions_collection():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+    load_dotenv()
+    uri = os.getenv("MONGODB_URI")
+    if not uri:
+        return None
+    return MongoClient(uri, serverSelectionTimeoutMS=2000).get_database()["user_interactions"]
+
+
+def export_interactions(top=500, min_count=5, min_agreement=0.9, scan=100000, path=INTERACTIONS_PATH):
+    """Writes the `top` most frequent logged messages whose intents agree at least `min_agreement` of the time."""
+    collection = interactions_collection()
+    if collection is None:
+        print("❌ MONGODB_URI is not set")
+        return None
+    counts, answers = Counter(), {}
+    cursor = collection.find({}, {"text": 1, "intent": 1, "_id": 0}).sort("_id", -1).limit(scan)
+    for doc in cursor:
+        key = fast_path_key(doc.get("text") or "")
+        if key and doc.get("intent"):
+            counts[key] += 1
+            answers.setdefault(key, Counter())[doc["intent"]] += 1
+    rows = []
+    for key, count in counts.most_common():
+        if count < min_count or len(rows) >= top:
+            break
+        intent, agreeing = answers[key].most_common(1)[0]
+        if agreeing / count >= min_agreement and intent != "unknown":
+            rows.append({"text": key, "intent": intent, "count": count})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+    print(f"✅ Exported {len(rows)} frequent messages to {path}")
+    return rows
+
+
+def report(limit=5000):
+    """Coverage of the table on logged (or synthetic) traffic and agreement with the models on the hits."""
+    os.environ.setdefault("ML_BATCH_WINDOW_MS", "0")
+    os.environ.setdefault("ML_LOAD_MODE", "eager")
+    os.environ["ML_FAST_PATH"] = "1"
+    from ml.benchmark import interaction_texts, time_per_call
+    from ml.ml_service import MLService
+
+    service = MLService()
+    table = service.fast_path
+    texts, source = interaction_texts(limit)
+    hits = table.lookup_batch(texts)
+    hit_rows = [i for i, hit in enumerate(hits) if hit]
+    print(f"Fast path: {len(table.entries)} entries ({table.dropped} dropped where the intent model disagrees, "
+          f"{len(interaction_entries())} candidates from user_interactions), {len(texts)} messages from {source}")
+    print(f"  hit rate {table.stats()['hit_rate']:.1%}   distinct messages hit "
+          f"{len({fast_path_key(texts[i]) for i in hit_rows})}")
+    if not hit_rows:
+        return
+
+    # The table answers intent only; sentiment runs the same path either way
+    hit_texts = [texts[i] for i in hit_rows]
+    sample = sorted(set(hit_texts))
+    service._analyze_batch(hit_texts)  # warm-up: first LSTM call per shape
+    served = service._analyze_batch(hit_texts)
+    table_intent = time_per_call(lambda m: service.score_intent_batch([m]), sample)
+    table_full = time_per_call(lambda m: service._analyze_batch([m]), sample, repeat=1)
+    table = service.fast_path
+    service.fast_path = None
+    scored = service._analyze_batch(hit_texts)
+    model_intent = time_per_call(lambda m: service.score_intent_batch([m]), sample)
+    model_full = time_per_call(lambda m: service._analyze_batch([m]), sample, repeat=1)
+    service.fast_path = table
+    intent_agree = sum(a["intent"] == b["intent"] for a, b in zip(served, scored)) / len(hit_rows)
+    sentiment_agree = sum(a["sentiment"] == b["sentiment"] for a, b in zip(served, scored)) / len(hit_rows)
+    print(f"  agreement with the models on hits: intent {intent_agree:.1%}   sentiment {sentiment_agree:.1%}")
+    print(f"  per hit, intent only:          model {np.median(model_intent):8.1f} µs   "
+          f"fast path {np.median(table_intent):8.1f} µs (median)")
+    print(f"  per hit, intent + sentiment:   model {np.median(model_full):8.1f} µs   "
+          f"fast path {np.median(table_full):8.1f} µs (median)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exact-match fast path table")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="export frequent user_interactions messages")
+    export.add_argument("--top", type=int, default=500)
+    export.add_argument("--min-count", type=int, default=5)
+    export.add_argument("--min-agreement", type=float, default=0.9)
+    rep = sub.add_parser("report", help="coverage and agreement report")
+    rep.add_argument("--limit", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_interactions(args.top, args.min_count, args.min_agreement)
+    else:
+        report(args.limit)
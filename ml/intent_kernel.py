@@ -0,0 +1,170 @@
+"""
+Compiled intent scorer.
+
+Exports a fitted TfidfVectorizer + LogisticRegression pair to plain NumPy/JSON
+artifacts and scores messages with a hand-rolled tokenize -> sparse dot product
+path, so the serving process never needs to import scikit-learn.
+
+Export from the current pickles (run from the repository root):
+
+    python -m ml.intent_kernel
+
+meta.json records the digest of the model.pkl it was exported from. When
+model.pkl is replaced by something else (e.g. a promoted incremental model),
+the kernel is stale and MLService serves the pickles instead.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+KERNEL_DIR = os.path.join(os.path.dirname(__file__), "intent_kernel")
+
+
+def model_digest(model_path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def export_intent_kernel(vectorizer, model, out_dir=KERNEL_DIR, source_digest=None):
+    """
+    Writes vocab.json, idf.npy, coef.npy, intercept.npy and meta.json to out_dir.
+    source_digest is the model_digest() of the model.pkl the pair was saved to.
+    """
+    if getattr(vectorizer, "analyzer", None) != "word" or tuple(vectorizer.ngram_range) != (1, 1):
+        raise ValueError("Only word unigram TF-IDF vectorizers can be compiled")
+    if vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+        raise ValueError("Custom tokenizers/preprocessors cannot be compiled")
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    classes = [str(c) for c in model.classes_]
+    if len(classes) == 2:
+        proba = "binary"
+    elif getattr(model, "solver", None) == "liblinear" or getattr(model, "multi_class", "auto") == "ovr":
+        proba = "ovr"
+    else:
+        proba = "softmax"
+
+    vocab = {token: int(col) for token, col in vectorizer.vocabulary_.items()}
+    idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(vocab))
+    # Transposed so the weights of one token are a contiguous row
+    coef_t = np.ascontiguousarray(model.coef_.T, dtype=np.float64)
+
+    with open(os.path.join(out_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    np.save(os.path.join(out_dir, "idf.npy"), np.asarray(idf, dtype=np.float64))
+    np.save(os.path.join(out_dir, "coef.npy"), coef_t)
+    np.save(os.path.join(out_dir, "intercept.npy"), np.asarray(model.intercept_, dtype=np.float64))
+    meta = {
+        "classes": classes,
+        "proba": proba,
+        "token_pattern": vectorizer.token_pattern,
+        "lowercase": bool(vectorizer.lowercase),
+        "binary": bool(vectorizer.binary),
+        "sublinear_tf": bool(vectorizer.sublinear_tf),
+        "norm": vectorizer.norm
+    }
+    if source_digest:
+        meta["model_digest"] = source_digest
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    print(f"✅ Compiled intent kernel exported to {out_dir} ({len(vocab)} terms, {len(classes)} classes)")
+
+
+def kernel_exists(path=KERNEL_DIR):
+    return os.path.exists(os.path.join(path, "meta.json"))
+
+
+def kernel_is_current(model_path, path=KERNEL_DIR):
+    """False when model.pkl is no longer the model the kernel was exported from."""
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        expected = json.load(f).get("model_digest")
+    # Kernels exported before the digest was recorded are trusted
+    if not expected or not os.path.exists(model_path):
+        return True
+    return model_digest(model_path) == expected
+
+
+class CompiledIntentScorer:
+    """
+    Drop-in replacement for vectorizer.transform + model.predict_proba.
+    Exposes `classes_` and `predict_proba(texts)` like the scikit-learn model.
+    """
+    def __init__(self, path=KERNEL_DIR, mmap_mode=None):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+            self.vocab = json.load(f)
+
+        self.idf = np.load(os.path.join(path, "idf.npy"), mmap_mode=mmap_mode)
+        self.coef_t = np.load(os.path.join(path, "coef.npy"), mmap_mode=mmap_mode)
+        self.intercept = np.load(os.path.join(path, "intercept.npy"))
+        self.classes_ = np.array(meta["classes"])
+
+        self.proba = meta["proba"]
+        self.lowercase = meta["lowercase"]
+        self.binary = meta["binary"]
+        self.sublinear_tf = meta["sublinear_tf"]
+        self.norm = meta["norm"]
+        self._token_re = re.compile(meta["token_pattern"])
+
+    def _features(self, text):
+        """Sparse TF-IDF row for one text as (column indices, weights)."""
+        if self.lowercase:
+            text = text.lower()
+        vocab = self.vocab
+        counts = Counter(vocab[t] for t in self._token_re.findall(text) if t in vocab)
+        if not counts:
+            return None, None
+        idx = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        if self.binary:
+            tf = np.ones(len(counts))
+        elif self.sublinear_tf:
+            tf = np.array([1.0 + math.log(c) for c in counts.values()])
+        else:
+            tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        weights = tf * self.idf[idx]
+        if self.norm == "l2":
+            weights /= math.sqrt(float(weights @ weights))
+        elif self.norm == "l1":
+            weights /= float(np.abs(weights).sum())
+        return idx, weights
+
+    def decision_function(self, texts):
+        scores = np.tile(self.intercept, (len(texts), 1))
+        for i, text in enumerate(texts):
+            idx, weights = self._features(text)
+            if idx is not None:
+                scores[i] += weights @ self.coef_t[idx]
+        return scores
+
+    def predict_proba(self, texts):
+        scores = self.decision_function(texts)
+        if self.proba == "binary":
+            p = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        if self.proba == "ovr":
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return p / p.sum(axis=1, keepdims=True)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        return scores / scores.sum(axis=1, keepdims=True)
+
+
+if __name__ == "__main__":
+    import pickle
+    base_path = os.path.dirname(__file__)
+    with open(os.path.join(base_path, "model.pkl"), "rb") as f:
+        intent_model = pickle.load(f)
+    with open(os.path.join(base_path, "vectorizer.pkl"), "rb") as f:
+        intent_vectorizer = pickle.load(f)
+    export_intent_kernel(intent_vectorizer, intent_model,
+                         source_digest=model_digest(os.path.join(base_path, "model.pkl")))
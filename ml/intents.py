@@ -0,0 +1,28 @@
+"""
+Intent label set shared by the dataset builder, the incremental trainer and
+the serving fast path. Kept free of imports so serving can use it without
+loading the data tooling (pandas).
+"""
+
+ALLOWED_INTENTS = {
+    "greeting", "thanks", "goodbye", "positive_feedback",
+    "get_order", "shipping_info", "payment_info", "account_issue",
+    "promos_discounts", "stock_info", "sizing_help",
+    "refund", "product_issue", "wrong_order",
+    "cancel_order", "change_order", "change_shipping_address",
+    "track_refund", "request_invoice", "missing_item",
+    "expedited_shipping", "shipping_restrictions",
+    "delete_account", "update_account", "newsletter_subscription", "privacy_policy",
+    "payment_failed", "currency_support", "gift_card",
+    "restock_alert", "product_care", "warranty_info", "authenticity",
+    "store_hours", "contact_support", "physical_location", "loyalty_program",
+    "careers", "gift_wrapping", "product_catalog", "price_query", "unknown"
+}
+
+# Source dataset labels renamed to the intents above
+LABEL_MAP = {
+    "refund_request": "refund",
+    "order_tracking": "get_order",
+    "availability_check": "stock_info",
+    "delivery_query": "shipping_info"
+}
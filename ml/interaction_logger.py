@@ -0,0 +1,259 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server only
+    fcntl = None
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from ml.batching import Histogram
+
+DEFAULT_SPILL_PATH = os.path.join(os.path.dirname(__file__), "data", "interaction_spill.jsonl")
+DUPLICATE_KEY = 11000
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"__oid__": str(value)}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode(obj):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__oid__" in obj:
+        return ObjectId(obj["__oid__"])
+    return obj
+
+
+class InteractionLogWriter:
+    """
+    Writes chat interactions to MongoDB off the request path.
+
+    `log()` only enqueues (and drops the record if the bounded queue is full).
+    A background thread flushes with insert_many once `batch_size` records are
+    queued or `flush_interval` seconds have passed. If Mongo is unavailable the
+    batch is appended to a local JSONL spill file, which is replayed after the
+    next successful flush. Records keep their _id across spill/replay, so a
+    partially inserted batch is not duplicated.
+
+    The spill file is shared by every worker on the host. Appends hold an
+    exclusive flock on `<spill>.lock`; a replay claims the file by renaming it
+    to `<spill>.<pid>.replay` under the same lock, so records appended while it
+    replays land in a fresh spill file instead of being truncated away. A claim
+    that fails to insert is appended back; one left by a dead worker is picked
+    up by the next replay.
+    """
+    def __init__(self, collection, max_queue=10000, batch_size=100, flush_interval=1.0,
+                 spill_path=DEFAULT_SPILL_PATH, retry_interval=30.0):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.retry_interval = retry_interval
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._last_replay_attempt = 0.0
+        self._closed = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.failures = 0
+        self.flush_ms = Histogram([1, 5, 10, 25, 50, 100, 250, 1000])
+
+        self._thread = threading.Thread(target=self._run, name="interaction-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, record):
+        try:
+            self._queue.put_nowait(record)
+            self.enqueued += 1
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while not self._closed:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._spill_pending() and time.monotonic() - self._last_replay_attempt > self.retry_interval:
+                self._replay()
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, docs):
+        try:
+            self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Already-written _ids from an earlier partial insert are fine
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+
+    def _flush(self, batch):
+        start = time.perf_counter()
+        try:
+            self._insert(batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.failures += 1
+            print(f"Logging error: {e}")
+            self._spill(batch)
+            return
+        finally:
+            self.flush_ms.observe((time.perf_counter() - start) * 1000.0)
+        if self._spill_pending():
+            self._replay()
+
+    @contextmanager
+    def _file_lock(self):
+        """Serializes spill file access across threads and worker processes."""
+        with self._spill_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.spill_path + ".lock", "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append(self, lines):
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+
+    def _spill(self, batch):
+        try:
+            lines = [json.dumps(doc, default=_encode) + "\n" for doc in batch]
+            with self._file_lock():
+                self._append(lines)
+            self.spilled += len(batch)
+        except OSError as e:
+            self.dropped += len(batch)
+            print(f"Logging spill error: {e}")
+
+    def _spill_pending(self):
+        try:
+            return os.path.getsize(self.spill_path) > 0 or bool(self._orphaned_claims())
+        except OSError:
+            return bool(self._orphaned_claims())
+
+    def _orphaned_claims(self):
+        """Claim files of workers that died mid-replay."""
+        orphans = []
+        for path in glob.glob(glob.escape(self.spill_path) + ".*.replay"):
+            try:
+                pid = int(path.rsplit(".", 2)[1])
+                if pid != os.getpid():
+                    os.kill(pid, 0)
+            except ProcessLookupError:
+                orphans.append(path)
+            except (ValueError, OSError):
+                continue
+        return orphans
+
+    def _claim(self):
+        """Moves the spill file (and orphaned claims) aside for this process to replay."""
+        claim = f"{self.spill_path}.{os.getpid()}.replay"
+        with self._file_lock():
+            for orphan in self._orphaned_claims():
+                with open(orphan, "r", encoding="utf-8") as f:
+                    self._append(f.readlines())
+                os.remove(orphan)
+            if os.path.exists(claim):
+                # A failed earlier replay of this process: put it back in line first
+                with open(claim, "r", encoding="utf-8") as f:
+                    self._append(f.readlines())
+                os.remove(claim)
+            if not os.path.exists(self.spill_path):
+                return None
+            os.replace(self.spill_path, claim)
+        return claim
+
+    def _replay(self):
+        self._last_replay_attempt = time.monotonic()
+        try:
+            claim = self._claim()
+        except OSError as e:
+            print(f"Logging replay error: {e}")
+            return
+        if claim is None:
+            return
+        try:
+            with open(claim, "r", encoding="utf-8") as f:
+                lines = [line for line in f if line.strip()]
+            docs = [json.loads(line, object_hook=_decode) for line in lines]
+            for start in range(0, len(docs), self.batch_size):
+                self._insert(docs[start:start + self.batch_size])
+            os.remove(claim)
+            self.replayed += len(docs)
+            if docs:
+                print(f"✅ Replayed {len(docs)} spilled interactions")
+        except Exception as e:
+            # Put the records back; batches that did get in are skipped next time by _id
+            print(f"Logging replay error: {e}")
+            try:
+                with self._file_lock():
+                    with open(claim, "r", encoding="utf-8") as f:
+                        self._append(f.readlines())
+                    os.remove(claim)
+            except OSError as e:
+                print(f"Logging replay error: {e}")
+
+    def close(self, timeout=5.0):
+        """Flushes whatever is still queued (called at interpreter exit)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._thread.join(timeout)
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._flush(batch)
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+            "flush_failures": self.failures,
+            "spill_pending": self._spill_pending(),
+            "flush_ms": self.flush_ms.snapshot()
+        }
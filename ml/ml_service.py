@@ -1,116 +1,502 @@
+import hashlib
+import importlib
 import pickle
-import re
+import threading
+from collections import Counter
+import time
 import numpy as np
 import os
-from keras.models import load_model
-from keras.preprocessing.sequence import pad_sequences
+from concurrent.futures import ThreadPoolExecutor
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from ml.batching import MicroBatcher
+from ml.fast_path import FastPath, INTERACTIONS_PATH
+from ml.intent_kernel import CompiledIntentScorer, kernel_exists, kernel_is_current, KERNEL_DIR
+from ml.prediction_cache import PredictionCache, SqliteStore, normalize_key
+from ml.sentiment_numpy import NumpySentimentModel, TokenLookup, weights_exist, WEIGHTS_DIR
+from ml.text_normalize import normalize_intent_batch, normalize_sentiment
+
+# Below this probability the intent is reported as "unknown"
+INTENT_MIN_CONFIDENCE = 0.15
+
+# Sequence length used in train_keras.py (MAX_LEN); longer messages keep their last tokens
+SENTIMENT_MAX_LEN = 100
+
+# Common Neutral/Positive Greetings & Phrases Whitelist, checked before the LSTM.
+# This prevents common words from being skewed by noisy LSTM training data.
+POSITIVE_KEYWORDS = ("mind blowing", "perfect", "suits", "amazing")
+NEUTRAL_PHRASES = frozenset({
+    "hello", "hi", "hey", "hola", "greetings", "morning", "afternoon", "evening",
+    "mind blowing", "perfect", "suits", "amazing", "wonderful", "excellent"
+})
 
 class MLService:
     def __init__(self):
-        base_path = os.path.dirname(__file__)
-        root_path = os.path.join(base_path, "..")
+        self.base_path = os.path.dirname(__file__)
+        self.root_path = os.path.join(self.base_path, "..")
         
         self.intent_model = None
         self.intent_vectorizer = None
+        self.intent_scorer = None
+        self.intent_engine = None
         self.sentiment_model = None
         self.sentiment_tokenizer = None
         self.sentiment_encoder = None
-        self.sentiment_analyzer = SentimentIntensityAnalyzer()
-        
-        # 1. Load Intent Model
+        self.sentiment_ready = False
+        self.sentiment_masked = False
+        self.sentiment_buckets = sorted(
+            min(int(b), SENTIMENT_MAX_LEN) for b in os.getenv("SENTIMENT_BUCKETS", "16,32,64,100").split(",")
+        )
+        self.intent_top_k = int(os.getenv("ML_INTENT_TOP_K", "3"))
+        # ML_MMAP_WEIGHTS=1 memory-maps the .npy artifacts so every worker shares one page-cache copy
+        self.mmap_mode = "r" if os.getenv("ML_MMAP_WEIGHTS", "0") == "1" else None
+
+        # Per-component load status/timings, reported at /health
+        self.components = {}
+        self.model_version = None
+
+        # Normalized message -> prediction cache (ML_CACHE_SIZE=0 disables it)
+        self.cache = None
+        cache_size = int(os.getenv("ML_CACHE_SIZE", "10000"))
+        if cache_size > 0:
+            cache_path = os.getenv("ML_CACHE_PATH")
+            self.cache = PredictionCache(
+                max_entries=cache_size,
+                max_bytes=int(os.getenv("ML_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+                ttl=float(os.getenv("ML_CACHE_TTL", "0")) or None,
+                store=SqliteStore(cache_path) if cache_path else None
+            )
+        self._sentiment_lock = threading.Lock()
+        self._sentiment_thread = None
+
+        self.sentiment_analyzer = self._timed("vader", SentimentIntensityAnalyzer)
+        # SENTIMENT_CASCADE=1 skips the LSTM when VADER or the intent model already settles the
+        # answer; sentiment only changes the reply for positive_feedback (see build_chat_response)
+        self.cascade = os.getenv("SENTIMENT_CASCADE", "0") == "1"
+        self.cascade_vader = float(os.getenv("CASCADE_VADER_THRESHOLD", "0.5"))
+        self.cascade_intent = float(os.getenv("CASCADE_INTENT_CONFIDENCE", "0.8"))
+        # Which tier answered each sentiment request
+        self.sentiment_tiers = Counter()
+
+        # Exact-match table answering the intent of frequent messages without the model (ML_FAST_PATH=0 disables it)
+        self.fast_path = None
+        self._timed("intent_model", self._load_intent)
+        self._timed("fast_path", self._build_fast_path)
+        self._refresh_version()
+
+        # 2. Sentiment Model: TensorFlow import dominates startup, so by default it
+        # is loaded in a background thread while /chat answers with the VADER fallback.
+        # ML_LOAD_MODE: "background" (default), "lazy" (on first sentiment request), "eager"
+        # SENTIMENT_ENGINE: "keras" (default) or "numpy" (exported weights, no TensorFlow)
+        self.sentiment_engine = os.getenv("SENTIMENT_ENGINE", "keras")
+        self.load_mode = os.getenv("ML_LOAD_MODE", "background")
+        if self.load_mode == "eager":
+            self._load_sentiment()
+        else:
+            self.components["sentiment_model"] = {"status": "pending", "seconds": None}
+            if self.load_mode == "background":
+                self.warm_sentiment()
+
+        # 3. Micro-batching: concurrent /chat requests share one model call
+        # ML_BATCH_WINDOW_MS=0 disables batching and predicts inline.
+        self.batcher = None
+        window_ms = float(os.getenv("ML_BATCH_WINDOW_MS", "5"))
+        if window_ms > 0:
+            max_size = int(os.getenv("ML_BATCH_MAX_SIZE", "64"))
+            self.batcher = MicroBatcher(self._analyze_batch, max_wait_ms=window_ms, max_batch_size=max_size)
+            print(f"✅ Micro-batching enabled ({window_ms} ms / max {max_size})")
+
+    def _timed(self, name, fn):
+        self.components[name] = {"status": "loading", "seconds": None}
+        start = time.perf_counter()
         try:
-            model_path = os.path.join(base_path, "model.pkl")
-            vec_path = os.path.join(base_path, "vectorizer.pkl")
-            if os.path.exists(model_path) and os.path.exists(vec_path):
-                with open(model_path, "rb") as f:
-                    self.intent_model = pickle.load(f)
-                with open(vec_path, "rb") as f:
-                    self.intent_vectorizer = pickle.load(f)
-                print("✅ Intent model loaded")
-            else:
-                print("⚠️ Intent model files not found")
+            result = fn()
+            status = "ready" if result is not False else "missing"
         except Exception as e:
-            print(f"❌ Error loading intent model: {e}")
+            print(f"❌ Error loading {name}: {e}")
+            result, status = None, "failed"
+        self.components[name] = {"status": status, "seconds": round(time.perf_counter() - start, 3)}
+        return result
 
-        # 2. Load Sentiment Model (Keras)
-        try:
+    def _load_intent(self):
+        # 1. Load Intent Model
+        # INTENT_ENGINE: "compiled" (NumPy kernel, no sklearn), "sklearn" (pickles),
+        # or "auto" (compiled when the exported kernel exists)
+        engine = os.getenv("INTENT_ENGINE", "auto")
+        model_path = os.path.join(self.base_path, "model.pkl")
+        vec_path = os.path.join(self.base_path, "vectorizer.pkl")
+        if engine in ("auto", "compiled") and kernel_exists() and not kernel_is_current(model_path):
+            print("⚠️ Compiled intent kernel is stale (model.pkl changed since export), using sklearn")
+        elif engine in ("auto", "compiled") and kernel_exists():
+            try:
+                self.intent_scorer = CompiledIntentScorer(mmap_mode=self.mmap_mode)
+                self.intent_engine = "compiled"
+                print("✅ Intent model loaded (compiled kernel)")
+                return True
+            except Exception as e:
+                print(f"❌ Error loading compiled intent kernel: {e}")
+        elif engine == "compiled":
+            print("⚠️ Compiled intent kernel not found, falling back to sklearn")
+
+        if not (os.path.exists(model_path) and os.path.exists(vec_path)):
+            print("⚠️ Intent model files not found")
+            return False
+        with open(model_path, "rb") as f:
+            self.intent_model = pickle.load(f)
+        with open(vec_path, "rb") as f:
+            self.intent_vectorizer = pickle.load(f)
+        self.intent_engine = "sklearn"
+        print("✅ Intent model loaded")
+        return True
+
+    def _build_fast_path(self):
+        """(Re)builds the fast path table from the intent model now loaded."""
+        self.fast_path = None
+        if os.getenv("ML_FAST_PATH", "1") == "0" or not self.intent_engine:
+            return False
+        self.fast_path = FastPath.build(lambda keys: self.score_intent_batch(keys, hits=[None] * len(keys)))
+        return True
+
+    def warm_sentiment(self):
+        """Starts loading the LSTM stack in a background thread (no-op if already started)."""
+        with self._sentiment_lock:
+            if self._sentiment_thread is None:
+                self._sentiment_thread = threading.Thread(
+                    target=self._load_sentiment, name="ml-sentiment-loader", daemon=True
+                )
+                self._sentiment_thread.start()
+
+    def after_fork(self):
+        """Restarts the threads a forked worker did not inherit; loaded models are kept."""
+        if self.batcher:
+            self.batcher.after_fork()
+        if self.cache and self.cache.store:
+            self.cache.store.after_fork()
+        self._sentiment_lock = threading.Lock()
+        if not self.sentiment_ready:
+            self._sentiment_thread = None
+            if self.load_mode == "background":
+                self.warm_sentiment()
+
+    def _load_sentiment(self):
+        start = time.perf_counter()
+        self.components["sentiment_model"] = {"status": "loading", "seconds": None}
+
+        if self.sentiment_engine == "numpy":
+            model, tokenizer, encoder = self._load_numpy_sentiment()
+        else:
+            model, tokenizer, encoder = self._load_keras_sentiment()
+
+        ready = bool(model and tokenizer and encoder)
+        if ready:
+            self.sentiment_tokenizer = tokenizer
+            self.sentiment_encoder = encoder
+            self.sentiment_model = model
+            self.sentiment_masked = self._masks_padding(model)
+            self.sentiment_ready = True
+            print(f"✅ Sentiment components fully initialized ({self.sentiment_engine})")
+            # LSTM answers differ from the VADER fallback: start a new cache generation
+            self._refresh_version()
+        self.components["sentiment_model"] = {
+            "status": "ready" if ready else "unavailable",
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+
+    @staticmethod
+    def _masks_padding(model):
+        if isinstance(model, NumpySentimentModel):
+            return model.mask_zero
+        embedding = model.layers[0] if model.layers else None
+        return bool(getattr(embedding, "mask_zero", False))
+
+    def _load_numpy_sentiment(self):
+        # Exported weights + vocabulary; no TensorFlow or sklearn import
+        if not weights_exist():
+            print("⚠️ NumPy sentiment weights not found (run python -m ml.sentiment_numpy)")
+            self.components["sentiment_numpy"] = {"status": "missing", "seconds": None}
+            return None, None, None
+        model = self._timed("sentiment_numpy", lambda: NumpySentimentModel(mmap_mode=self.mmap_mode))
+        if not model:
+            return None, None, None
+        return model, model.tokenizer(), model.label_decoder()
+
+    def _load_keras_sentiment(self):
+        base_path, root_path = self.base_path, self.root_path
+
+        def load_pickle(path):
+            if not os.path.exists(path):
+                return False
+            with open(path, "rb") as f:
+                return pickle.load(f)
+
+        def load_keras():
             # Try .keras first, then .h5 if available
             keras_path = os.path.join(root_path, "sentiment_model.keras")
             h5_path = os.path.join(root_path, "sentiment_model.h5")
-            
             target_model_path = None
             if os.path.exists(keras_path): target_model_path = keras_path
             elif os.path.exists(h5_path): target_model_path = h5_path
-            
-            if target_model_path:
-                self.sentiment_model = load_model(target_model_path)
-                print(f"✅ Sentiment model ({os.path.basename(target_model_path)}) loaded")
-            
-            tok_path = os.path.join(base_path, "tokenizer.pkl")
-            enc_path = os.path.join(root_path, "sentiment_label_encoder.pkl")
-            
-            if os.path.exists(tok_path):
-                with open(tok_path, "rb") as f:
-                    self.sentiment_tokenizer = pickle.load(f)
-            if os.path.exists(enc_path):
-                with open(enc_path, "rb") as f:
-                    self.sentiment_encoder = pickle.load(f)
-                    
-            if self.sentiment_model and self.sentiment_tokenizer and self.sentiment_encoder:
-                print("✅ Sentiment components fully initialized")
-        except Exception as e:
-            print(f"❌ Error loading sentiment components: {e}")
+            if not target_model_path:
+                return False
+            from keras.models import load_model
+            model = load_model(target_model_path)
+            print(f"✅ Sentiment model ({os.path.basename(target_model_path)}) loaded")
+            return model
+
+        def load_keras_stack():
+            # The tokenizer pickle references Keras classes, so it loads after the import
+            self._timed("tensorflow_import", lambda: importlib.import_module("keras"))
+            model = self._timed("sentiment_keras", load_keras)
+            tokenizer = self._timed("sentiment_tokenizer",
+                                    lambda: load_pickle(os.path.join(base_path, "tokenizer.pkl")))
+            # Serve with the sorted-array lookup; the Keras object is only its source
+            return model, TokenLookup.from_keras(tokenizer) if tokenizer else tokenizer
+
+        # The label encoder (sklearn) loads while TensorFlow is importing
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            keras_stack = pool.submit(load_keras_stack)
+            encoder = pool.submit(self._timed, "sentiment_encoder",
+                                  lambda: load_pickle(os.path.join(root_path, "sentiment_label_encoder.pkl")))
+            (model, tokenizer), encoder = keras_stack.result(), encoder.result()
+        return model, tokenizer, encoder
+
+    def health(self):
+        return {
+            "load_mode": self.load_mode,
+            "intent_engine": self.intent_engine,
+            "sentiment_engine": self.sentiment_engine if self.sentiment_ready else "vader",
+            "components": dict(self.components)
+        }
+
+    def analyze(self, message):
+        """
+        Returns {"intent", "confidence", "top_intents", "sentiment"} for one message. When batching is enabled
+        the call blocks until the batch containing this message has been scored.
+        The message is scored in its cache key form (whitespace collapsed), so a
+        cached answer is always the one a cold call would give.
+        """
+        if message:
+            message = normalize_key(message)
+        key = message if self.cache and message else None
+        if key:
+            version = self.cache.version
+            cached = self.cache.get(key)
+            if cached is not None:
+                return dict(cached)
+
+        if self.batcher:
+            result = self.batcher.submit(message).result()
+        else:
+            result = self._analyze_batch([message])[0]
+
+        if key:
+            self.cache.put(key, result, version)
+        return result
+
+    def reload(self):
+        """Reloads all models from disk (e.g. after retraining); cached predictions are dropped."""
+        self._timed("intent_model", self._load_intent)
+        self._timed("fast_path", self._build_fast_path)
+        self._load_sentiment()
+        self._refresh_version()
+
+    def _refresh_version(self):
+        """
+        Fingerprint of the models currently serving: engines, whether the LSTM is
+        warm, and the size/mtime of every artifact on disk. Any change invalidates
+        the prediction cache.
+        """
+        parts = [str(self.intent_engine), self.sentiment_engine if self.sentiment_ready else "vader"]
+        candidates = [
+            os.path.join(self.base_path, "model.pkl"),
+            os.path.join(self.base_path, "vectorizer.pkl"),
+            os.path.join(self.base_path, "tokenizer.pkl"),
+            os.path.join(self.root_path, "sentiment_model.keras"),
+            os.path.join(self.root_path, "sentiment_model.h5"),
+            os.path.join(self.root_path, "sentiment_label_encoder.pkl"),
+            os.path.join(KERNEL_DIR, "coef.npy"),
+            os.path.join(WEIGHTS_DIR, "meta.json"),
+            INTERACTIONS_PATH,
+        ]
+        for path in candidates:
+            if os.path.exists(path):
+                st = os.stat(path)
+                parts.append(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns}")
+        self.model_version = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:12]
+        if self.cache:
+            self.cache.set_version(self.model_version)
+
+    def stats(self):
+        return {
+            "model_version": self.model_version,
+            "batching": self.batcher.stats() if self.batcher else None,
+            "cache": self.cache.stats() if self.cache else None,
+            "fast_path": self.fast_path.stats() if self.fast_path else None,
+            "sentiment_tiers": dict(self.sentiment_tiers)
+        }
+
+    def _fast_path_hits(self, messages):
+        return self.fast_path.lookup_batch(messages) if self.fast_path else [None] * len(messages)
+
+    def _analyze_batch(self, messages):
+        scored = self.score_intent_batch(messages)
+        sentiments = self.predict_sentiment_batch(messages, intents=scored)
+        for result, sentiment in zip(scored, sentiments):
+            result["sentiment"] = sentiment
+        return scored
 
     def predict_intent(self, message):
-        if not message: return "unknown"
+        return self.predict_intent_batch([message])[0]
+
+    def predict_sentiment(self, message):
+        return self.predict_sentiment_batch([message])[0]
+
+    def predict_intent_batch(self, messages):
+        """
+        Classifies a list of messages with one sparse TF-IDF transform and one
+        predict_proba call. Empty messages map to "unknown".
+        """
+        return [scored["intent"] for scored in self.score_intent_batch(messages)]
+
+    def score_intent_batch(self, messages, top_k=None, hits=None):
+        """
+        Single scoring pass for the intent model: one predict_proba per batch,
+        label taken as the argmax against classes_. Each result carries the
+        winning intent, its confidence and the top-k ranked intents. Fast path
+        hits reuse the result the model gave for that key when the table was built.
+        """
+        top_k = top_k or self.intent_top_k
+        hits = hits or self._fast_path_hits(messages)
+        results = [{"intent": "unknown", "confidence": 0.0, "top_intents": []} for _ in messages]
+        rows = []
+        for i, (message, hit) in enumerate(zip(messages, hits)):
+            if hit:
+                results[i] = dict(hit, top_intents=hit["top_intents"][:top_k])
+            elif message:
+                rows.append(i)
+        if not rows or not self.intent_engine:
+            return results
         try:
-            if not self.intent_vectorizer or not self.intent_model:
-                return "unknown"
-            X = self.intent_vectorizer.transform([message.lower()])
-            probabilities = self.intent_model.predict_proba(X)[0]
-            if max(probabilities) < 0.15: return "unknown"
-            return self.intent_model.predict(X)[0]
+            probabilities, classes = self._intent_proba(normalize_intent_batch([messages[i] for i in rows]))
+            ranked = np.argsort(-probabilities, axis=1, kind="stable")[:, :top_k]
+            for row, probs, order in zip(rows, probabilities, ranked):
+                confidence = float(probs[order[0]])
+                results[row] = {
+                    "intent": str(classes[order[0]]) if confidence >= INTENT_MIN_CONFIDENCE else "unknown",
+                    "confidence": round(confidence, 4),
+                    "top_intents": [
+                        {"intent": str(classes[j]), "confidence": round(float(probs[j]), 4)} for j in order
+                    ]
+                }
         except:
-            return "unknown"
+            pass
+        return results
 
-    def predict_sentiment(self, message):
+    def _intent_proba(self, texts):
+        if self.intent_engine == "compiled":
+            return self.intent_scorer.predict_proba(texts), self.intent_scorer.classes_
+        X = self.intent_vectorizer.transform(texts)
+        return self.intent_model.predict_proba(X), self.intent_model.classes_
+
+    def predict_sentiment_batch(self, messages, intents=None):
+        """
+        Scores a list of messages: keyword rules first, then
+        (with SENTIMENT_CASCADE) VADER / intent gates, then a single padded LSTM
+        pass for the remaining rows, and VADER only for rows the LSTM couldn't
+        score. `intents` are score_intent_batch results for the same messages.
+        """
+        results = [None] * len(messages)
+        tiers = Counter()
+        neural_rows, neural_texts = [], []
+        for i, message in enumerate(messages):
+            rule = self._sentiment_rule(message)
+            if rule:
+                results[i] = rule
+                tiers["rule"] += 1
+                continue
+            if self.cascade:
+                tier, label = self._cascade_sentiment(message, intents[i] if intents else None)
+                if tier:
+                    results[i] = label
+                    tiers[tier] += 1
+                    continue
+            neural_rows.append(i)
+            neural_texts.append(normalize_sentiment(message))
+
+        if neural_rows and not self.sentiment_ready and self.load_mode == "lazy":
+            self.warm_sentiment()
+
+        # Priority 1: Try Neural Model (once warm), one padded pass per length bucket
+        try:
+            if neural_rows and self.sentiment_ready:
+                # Right-aligned ids, so the last `bucket` columns are the batch padded to that bucket
+                X, lengths = self.sentiment_tokenizer.encode(neural_texts, SENTIMENT_MAX_LEN, normalized=True)
+                buckets = {}
+                for k, length in enumerate(lengths):
+                    if length > 0:
+                        buckets.setdefault(self._sentiment_bucket(length), []).append(k)
+                for maxlen, scored in buckets.items():
+                    pred = self.sentiment_model.predict(X[scored, SENTIMENT_MAX_LEN - maxlen:], batch_size=256, verbose=0)
+                    labels = self.sentiment_encoder.inverse_transform(np.argmax(pred, axis=1))
+                    for k, label in zip(scored, labels):
+                        results[neural_rows[k]] = str(label)
+                    tiers["lstm"] += len(scored)
+        except Exception as e:
+            print(f"DEBUG: Neural sentiment fail: {e}")
+
+        # Priority 2: VADER Fallback
+        for i, message in enumerate(messages):
+            if results[i] is None:
+                results[i] = self._vader_sentiment(message)
+                tiers["vader_fallback"] += 1
+        self.sentiment_tiers.update(tiers)
+        return results
+
+    def _cascade_sentiment(self, message, scored):
+        """(tier, sentiment) when a cheap signal is decisive, else (None, None) and the LSTM decides."""
+        compound = self._vader_compound(message)
+        if abs(compound) >= self.cascade_vader:
+            return "cascade_vader", self._vader_label(compound)
+        # A confident intent other than positive_feedback gets the same reply whatever the sentiment
+        if scored and scored["intent"] != "positive_feedback" and scored["confidence"] >= self.cascade_intent:
+            return "cascade_intent", self._vader_label(compound)
+        return None, None
+
+    def _sentiment_bucket(self, length):
+        """
+        Padded length for a sequence. Models that mask padding (mask_zero) give the
+        same output at any padded length, so short messages use the smallest bucket
+        that fits; legacy unmasked models always get the full SENTIMENT_MAX_LEN.
+        """
+        if self.sentiment_masked:
+            for bucket in self.sentiment_buckets:
+                if length <= bucket:
+                    return bucket
+        return SENTIMENT_MAX_LEN
+
+    def _sentiment_rule(self, message):
         if not message: return "neutral"
         lower_msg = message.strip().lower()
-        
-        # Priority 0: Common Neutral/Positive Greetings & Phrases Whitelist
-        # This prevents common words from being skewed by noisy LSTM training data
-        neutral_words = {
-            "hello", "hi", "hey", "hola", "greetings", "morning", "afternoon", "evening",
-            "mind blowing", "perfect", "suits", "amazing", "wonderful", "excellent"
-        }
-        
+
         # Check for positive keywords first
-        if any(w in lower_msg for w in ["mind blowing", "perfect", "suits", "amazing"]):
+        if any(w in lower_msg for w in POSITIVE_KEYWORDS):
             return "positive"
-            
-        if lower_msg in neutral_words:
+
+        if lower_msg in NEUTRAL_PHRASES:
             return "neutral"
-        
-        # Priority 1: Try Neural Model (if components exist)
-        try:
-            if self.sentiment_model and self.sentiment_tokenizer and self.sentiment_encoder:
-                clean_msg = re.sub(r"[^a-zA-Z ]", "", message.lower())
-                seq = self.sentiment_tokenizer.texts_to_sequences([clean_msg])
-                if seq and len(seq[0]) > 0:
-                    X = pad_sequences(seq, maxlen=100)
-                    pred = self.sentiment_model.predict(X, verbose=0)
-                    idx = np.argmax(pred)
-                    return self.sentiment_encoder.inverse_transform([idx])[0]
-        except Exception as e:
-            print(f"DEBUG: Neural sentiment fail: {e}")
-        
-        # Priority 2: VADER Fallback
+        return None
+
+    def _vader_sentiment(self, message):
+        return self._vader_label(self._vader_compound(message))
+
+    def _vader_compound(self, message):
         try:
-            scores = self.sentiment_analyzer.polarity_scores(message)
-            if scores['compound'] <= -0.05: return "negative"
-            if scores['compound'] >= 0.05: return "positive"
+            return self.sentiment_analyzer.polarity_scores(message)['compound']
         except Exception as e:
             print(f"DEBUG: VADER fail: {e}")
-            
+        return 0.0
+
+    @staticmethod
+    def _vader_label(compound):
+        if compound <= -0.05: return "negative"
+        if compound >= 0.05: return "positive"
         return "neutral"
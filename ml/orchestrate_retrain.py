@@ -1,67 +1,171 @@
 import os
 import csv
+import json
+import hashlib
+import argparse
+from datetime import timedelta
+from bson import ObjectId
 from pymongo import MongoClient
 from dotenv import load_dotenv
-import subprocess
+import sys
+
+# Allow `python ml/orchestrate_retrain.py` as well as `python -m ml.orchestrate_retrain`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Load environment variables
 load_dotenv()
 
-def fetch_and_prepare_data():
+CONTRIBUTIONS_PATH = os.path.join("ml", "data", "user_contributions.csv")
+STATE_PATH = os.path.join("ml", "data", "user_contributions.state.json")
+FIELDNAMES = ["text", "intent", "sentiment"]
+# Only the fields we train on (_id is returned anyway and is the high-water mark)
+PROJECTION = {"text": 1, "intent": 1, "sentiment": 1}
+
+def load_state():
+    try:
+        with open(STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state):
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, STATE_PATH)
+
+def row_key(text, intent, sentiment):
+    return hashlib.blake2b(f"{text.lower()}\x00{intent}\x00{sentiment}".encode("utf-8"), digest_size=8).digest()
+
+def existing_keys(path=CONTRIBUTIONS_PATH):
     """
-    Fetches logged interactions from MongoDB and prepares them for training.
-    Logs are combined with the static synthetic data.
+    8-byte hashes of the rows already exported, streamed from the CSV. In a set
+    that is about 75 bytes per row (the bytes object plus its hash slot), still
+    far less than holding the rows themselves.
     """
+    keys = set()
+    if os.path.exists(path):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                keys.add(row_key(row["text"], row["intent"], row["sentiment"]))
+    return keys
+
+def fetch_and_prepare_data(full=False):
+    """
+    Exports new logged interactions from MongoDB to user_contributions.csv,
+    which generate_training_csv.py combines with the static synthetic data.
+
+    Interactions are streamed with a cursor in _id order and appended to the
+    CSV; the last exported _id is saved in user_contributions.state.json so
+    the next run only reads newer documents. Rows already in the CSV are
+    skipped. `full=True` rebuilds the export from scratch into a temporary
+    file that replaces the CSV and state only once the fetch has completed,
+    so a failed rebuild leaves the previous export in place.
+    """
+    # A full rebuild writes next to the CSV and swaps it in at the end
+    out_path = CONTRIBUTIONS_PATH + ".full" if full else CONTRIBUTIONS_PATH
     try:
         client = MongoClient(os.getenv("MONGODB_URI"))
         db = client.get_database()
         interactions_col = db["user_interactions"]
-        
-        # Get all interactions (could add date filters here for daily training)
-        interactions = list(interactions_col.find())
-        print(f"📊 Found {len(interactions)} user interactions in DB")
-        
-        if not interactions:
+
+        if full and os.path.exists(out_path):
+            os.remove(out_path)
+
+        state = {} if full else load_state()
+        query = {}
+        if state.get("last_id"):
+            # Re-read a window before the mark: spilled logs are replayed with their original (older) _ids
+            overlap = float(os.getenv("RETRAIN_OVERLAP_SECONDS", "3600"))
+            since = ObjectId(state["last_id"]).generation_time - timedelta(seconds=overlap)
+            query = {"_id": {"$gt": ObjectId.from_datetime(since)}}
+            print(f"📊 Reading interactions after {state['last_id']} (minus {overlap:.0f}s overlap)")
+
+        batch_size = int(os.getenv("RETRAIN_BATCH_SIZE", "1000"))
+        cursor = interactions_col.find(query, PROJECTION).sort("_id", 1).batch_size(batch_size)
+
+        seen = existing_keys(out_path)
+        write_header = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+        scanned = added = duplicates = 0
+        last_id = ObjectId(state["last_id"]) if state.get("last_id") else None
+
+        with open(out_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            if write_header:
+                writer.writeheader()
+            for inter in cursor:
+                # Persist progress per batch so an interrupted export resumes instead of restarting
+                if not full and scanned and scanned % batch_size == 0:
+                    f.flush()
+                    save_state({"last_id": str(last_id), "rows": len(seen)})
+                scanned += 1
+                if last_id is None or inter["_id"] > last_id:
+                    last_id = inter["_id"]
+                text = inter.get("text")
+                intent = inter.get("intent")
+                sentiment = inter.get("sentiment")
+                # We only want to learn from reasonably long, labelled messages
+                if not isinstance(text, str) or len(text) <= 3 or not intent or not sentiment:
+                    continue
+                key = row_key(text, intent, sentiment)
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                writer.writerow({"text": text, "intent": intent, "sentiment": sentiment})
+                added += 1
+
+        if full:
+            os.replace(out_path, CONTRIBUTIONS_PATH)
+            if last_id is None and os.path.exists(STATE_PATH):
+                os.remove(STATE_PATH)
+        if last_id is not None:
+            save_state({"last_id": str(last_id), "rows": len(seen)})
+        print(f"📊 Scanned {scanned} interactions: {added} new, {duplicates} duplicates ({len(seen)} rows total)")
+
+        if not added:
             print("⚠️ No new interactions found to retrain.")
             return False
-
-        # Prepare new data for generate_training_csv.py to consume
-        # We'll save them to a temporary CSV that the aggregator can pick up
-        output_path = os.path.join("ml", "data", "user_contributions.csv")
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=["text", "intent", "sentiment"])
-            writer.writeheader()
-            for inter in interactions:
-                # We only want to learn from reasonably long messages
-                if len(inter['text']) > 3:
-                    writer.writerow({
-                        "text": inter['text'],
-                        "intent": inter['intent'],
-                        "sentiment": inter['sentiment']
-                    })
-        print(f"✅ Saved {len(interactions)} interactions to user_contributions.csv")
+        print(f"✅ Appended {added} interactions to user_contributions.csv")
         return True
     except Exception as e:
         print(f"❌ Error fetching data: {e}")
+        if full and os.path.exists(out_path):
+            os.remove(out_path)
         return False
 
-def run_retrain():
+def run_retrain(force=False):
     """
-    Executes the standard training pipeline.
+    Runs the full training pipeline (synthetic data -> aggregation -> model)
+    in this process; stages whose inputs did not change are reused from cache.
     """
-    print("🚀 Starting retraining pipeline...")
-    
-    # 1. Regenerate synthetic data (ensures base quality)
-    subprocess.run(["python", "ml/data/generate_intents.py"], check=True)
-    
-    # 2. Re-aggregate all data (Aggregator must be updated to include user_contributions.csv)
-    subprocess.run(["python", "ml/data/generate_training_csv.py"], check=True)
-    
-    # 3. Retrain model
-    subprocess.run(["python", "ml/train.py"], check=True)
-    
+    from ml.pipeline import run_pipeline
+    from ml.train import print_metrics
+
+    result = run_pipeline(force=force)
+    print_metrics(result["metrics"])
     print("✅ Model retraining complete!")
 
+def run_incremental_retrain():
+    """
+    Folds only the newly exported rows into the hashing + SGD intent model
+    (ml/train_incremental.py) and promotes it if holdout accuracy stays within
+    reach of a full refit. Seconds instead of the full pipeline.
+    """
+    from ml.train_incremental import train_and_promote
+
+    print("🚀 Starting incremental retraining...")
+    train_and_promote()
+
 if __name__ == "__main__":
-    if fetch_and_prepare_data():
-        run_retrain()
+    parser = argparse.ArgumentParser(description="Export new interactions and retrain")
+    parser.add_argument("--full", action="store_true", help="re-export all interactions instead of only new ones")
+    parser.add_argument("--force", action="store_true", help="rerun every pipeline stage, ignoring the cache")
+    parser.add_argument("--incremental", action="store_true",
+                        help="update the incremental intent model instead of the full rebuild")
+    args = parser.parse_args()
+    if fetch_and_prepare_data(full=args.full):
+        if args.incremental:
+            run_incremental_retrain()
+        else:
+            run_retrain(force=args.force)
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Only the fields the chat reply uses
+ORDER_PROJECTION = {"_id": 0, "orderNumber": 1, "status": 1, "items": 1, "total": 1}
+
+
+def format_order(order):
+    return f"Order {order['orderNumber']}\nStatus: {order['status']}\nItems: {', '.join(order['items'])}\nTotal: ${order['total']}"
+
+
+class OrderLookup:
+    """
+    Read-through cache in front of the orders collection. Found orders are
+    cached for `ttl` seconds; unknown order numbers are cached for the shorter
+    `negative_ttl` so repeated typos don't hit Mongo, while newly created
+    orders still show up quickly.
+    """
+    def __init__(self, collection, ttl=30.0, negative_ttl=10.0, max_entries=10000):
+        self.collection = collection
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self._cache = OrderedDict()  # order_id -> (details or None, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def ensure_index(self):
+        try:
+            self.collection.create_index("orderNumber")
+        except Exception as e:
+            print(f"⚠️ Could not ensure orderNumber index: {e}")
+
+    def get_details(self, order_id):
+        """Formatted order summary, or None if no such order exists."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(order_id)
+            if entry is not None and entry[1] > now:
+                self._cache.move_to_end(order_id)
+                if entry[0] is None:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        order = self.collection.find_one({"orderNumber": order_id}, ORDER_PROJECTION)
+        details = format_order(order) if order else None
+
+        with self._lock:
+            ttl = self.ttl if details is not None else self.negative_ttl
+            self._cache[order_id] = (details, time.monotonic() + ttl)
+            self._cache.move_to_end(order_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return details
+
+    def invalidate(self, order_id=None):
+        with self._lock:
+            if order_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(order_id, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+                "ttl": self.ttl,
+                "negative_ttl": self.negative_ttl
+            }
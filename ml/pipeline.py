@@ -0,0 +1,172 @@
+"""
+In-process retraining pipeline:
+
+    synthetic  -> generate_intents.generate_rows()
+    aggregate  -> generate_training_csv.aggregate()
+    train      -> train.train_intent_model() + save_intent_model()
+
+Stages hand their output to the next one in memory (rows -> DataFrame ->
+model) instead of through scripts and intermediate CSVs. Each stage is keyed
+by a hash of its inputs (code, source files, seed), and a stage whose key
+has not changed is loaded from ml/.pipeline_cache/ instead of being rerun.
+Run from the repository root:
+
+    python -m ml.pipeline [--force] [--seed 42] [--no-csv] [--no-cv]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import pickle
+import random
+import time
+
+import pandas as pd
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(ML_DIR, "data")
+CACHE_DIR = os.path.join(ML_DIR, ".pipeline_cache")
+TRAINING_CSV = os.path.join(ML_DIR, "chatbot_training_data.csv")
+
+
+def file_digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def stage_key(*parts):
+    return hashlib.blake2b("\x00".join(str(p) for p in parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def cache_load(stage, key, cache_dir=CACHE_DIR):
+    path = os.path.join(cache_dir, f"{stage}-{key}.pkl")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable cache {path}: {e}")
+        return None
+
+
+def cache_store(stage, key, value, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    # One entry per stage: older keys can never be hit again once their inputs changed
+    for old in glob.glob(os.path.join(cache_dir, f"{stage}-*.pkl")):
+        os.remove(old)
+    path = os.path.join(cache_dir, f"{stage}-{key}.pkl")
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+
+def source_files():
+    """Every dataset aggregate() may read; the synthetic intents are passed in memory instead."""
+    return sorted(p for p in glob.glob(os.path.join(DATA_DIR, "*.csv"))
+                  if os.path.basename(p) != "chatbot_intents.csv")
+
+
+class Pipeline:
+    def __init__(self, seed=42, force=False, write_csv=True, cv=5):
+        self.seed = seed
+        self.force = force
+        self.write_csv = write_csv
+        self.cv = cv
+        self.timings = {}
+        self.cached = []
+
+    def _run_stage(self, name, key, fn, valid=lambda value: True):
+        start = time.perf_counter()
+        value = None if self.force else cache_load(name, key)
+        if value is not None and not valid(value):
+            value = None
+        if value is not None:
+            self.cached.append(name)
+        else:
+            value = fn()
+            cache_store(name, key, value)
+        self.timings[name] = time.perf_counter() - start
+        status = "cached" if name in self.cached else "ran"
+        print(f"  {name:<10} {status:<7} {self.timings[name]:8.2f}s")
+        return value
+
+    def synthetic(self):
+        from ml.data import generate_intents
+        key = stage_key(file_digest(generate_intents.__file__), self.seed)
+        rows = self._run_stage("synthetic", key,
+                               lambda: generate_intents.generate_rows(random.Random(self.seed)))
+        return key, rows
+
+    def aggregate(self, synthetic_key, synthetic_rows):
+        from ml import intents, text_normalize
+        from ml.data import generate_training_csv
+        sources = [(os.path.basename(p), file_digest(p)) for p in source_files()]
+        key = stage_key(synthetic_key, file_digest(generate_training_csv.__file__),
+                        file_digest(intents.__file__), file_digest(text_normalize.__file__), sources, self.seed)
+
+        def build():
+            rows, _ = generate_training_csv.aggregate(synthetic_rows, seed=self.seed, use_cache=not self.force)
+            return pd.DataFrame(rows, columns=["text", "intent", "sentiment"])
+
+        df = self._run_stage("aggregate", key, build)
+        if self.write_csv and ("aggregate" not in self.cached or not os.path.exists(TRAINING_CSV)):
+            # For the tools that still read it (train_keras.py, train_incremental.py)
+            df.to_csv(TRAINING_CSV, index=False)
+        return key, df
+
+    def train(self, aggregate_key, df):
+        key = stage_key(aggregate_key, file_digest(os.path.join(ML_DIR, "train.py")), self.cv)
+        model_path = os.path.join(ML_DIR, "model.pkl")
+
+        def fit():
+            # Imported here so a fully cached run never loads scikit-learn
+            from ml import train
+            vectorizer, model, metrics = train.train_intent_model(
+                df["text"].astype(str).tolist(), df["intent"].tolist(), cv=self.cv
+            )
+            train.save_intent_model(vectorizer, model, report=metrics)
+            return {"metrics": metrics, "model_digest": file_digest(model_path)}
+
+        def still_deployed(value):
+            # The cache holds only metrics; the model is ml/model.pkl, which something else may have replaced
+            return os.path.exists(model_path) and file_digest(model_path) == value["model_digest"]
+
+        return self._run_stage("train", key, fit, valid=still_deployed)["metrics"]
+
+    def run(self):
+        print("🚀 Running training pipeline (stage, status, seconds):")
+        start = time.perf_counter()
+        synthetic_key, synthetic_rows = self.synthetic()
+        aggregate_key, df = self.aggregate(synthetic_key, synthetic_rows)
+        metrics = self.train(aggregate_key, df)
+        self.timings["total"] = time.perf_counter() - start
+        print(f"  {'total':<10} {'':<7} {self.timings['total']:8.2f}s")
+        return {
+            "metrics": metrics,
+            "timings": {k: round(v, 3) for k, v in self.timings.items()},
+            "cached": self.cached
+        }
+
+
+def run_pipeline(seed=42, force=False, write_csv=True, cv=5):
+    return Pipeline(seed=seed, force=force, write_csv=write_csv, cv=cv).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the intent training pipeline in one process")
+    parser.add_argument("--force", action="store_true", help="rerun every stage, ignoring the cache")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-csv", action="store_true", help="don't write ml/chatbot_training_data.csv")
+    parser.add_argument("--no-cv", action="store_true", help="skip cross-validation (fast retrain)")
+    args = parser.parse_args()
+
+    result = run_pipeline(seed=args.seed, force=args.force, write_csv=not args.no_csv,
+                          cv=0 if args.no_cv else 5)
+    from ml.train import print_metrics
+    print_metrics(result["metrics"])
+    print(json.dumps(result["timings"]))
@@ -0,0 +1,197 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_key(message):
+    """
+    Cache key for a message. Whitespace is collapsed but case is kept, because
+    VADER treats capitalised words ("GREAT") as emphasis. MLService.analyze
+    scores this form of the message, so every message with one key gets the
+    same answer.
+    """
+    return " ".join(message.split())
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of message -> prediction results, with optional TTL and
+    a byte budget. Entries belong to a model version; when MLService loads a
+    different version, `set_version` drops everything cached for the old one.
+    An optional `SqliteStore` is consulted on local misses so that several
+    worker processes share hits.
+    """
+    def __init__(self, max_entries=10000, max_bytes=16 * 1024 * 1024, ttl=None, store=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store = store
+        self.version = None
+
+        self._entries = OrderedDict()  # key -> (value, size, created)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def set_version(self, version):
+        with self._lock:
+            if version == self.version:
+                return
+            if self.version is not None:
+                self.invalidations += 1
+            self.version = version
+            self._entries.clear()
+            self._bytes = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, created = entry
+                if self.ttl and now - created > self.ttl:
+                    self._remove(key)
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+            version = self.version
+
+        if self.store:
+            value = self.store.get(version, key, self.ttl)
+            if value is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                self._insert(key, value, version)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value, version):
+        """`version` is the model version the value was computed with."""
+        if version != self.version:
+            return
+        self._insert(key, value, version)
+        if self.store:
+            self.store.put(version, key, value)
+
+    def _insert(self, key, value, version):
+        size = len(key.encode("utf-8")) + len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if version != self.version:
+                return  # computed by a model that has since been replaced
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "shared_store": self.store.path if self.store else None
+            }
+
+
+class SqliteStore:
+    """
+    On-disk cache tier shared by all worker processes on one host. SQLite
+    connections must not cross fork() (POSIX locks are not inherited), so each
+    process opens its own on first use.
+    """
+    def __init__(self, path, max_rows=100000):
+        self.path = path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._pid = None
+        self._conn = None
+        # Connections inherited from a parent: never used, and never closed either,
+        # since closing one could checkpoint or remove the WAL under the parent
+        self._inherited = []
+        self._connection()
+
+    def _connection(self):
+        if self._pid != os.getpid():
+            if self._conn is not None:
+                self._inherited.append(self._conn)
+            self._conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                " version TEXT, key TEXT, value TEXT, created REAL,"
+                " PRIMARY KEY (version, key))"
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+    def after_fork(self):
+        """Opens this process's own connection (called in each forked worker)."""
+        self._lock = threading.Lock()
+        self._connection()
+
+    def get(self, version, key, ttl=None):
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT value, created FROM predictions WHERE version = ? AND key = ?", (version, key)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"DEBUG: cache store read fail: {e}")
+            return None
+        if row is None or (ttl and time.time() - row[1] > ttl):
+            return None
+        return json.loads(row[0])
+
+    def put(self, version, key, value):
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                    (version, key, json.dumps(value), time.time())
+                )
+                self._puts += 1
+                if self._puts % 1000 == 0:
+                    # Keep the newest max_rows entries
+                    conn.execute(
+                        "DELETE FROM predictions WHERE rowid IN ("
+                        " SELECT rowid FROM predictions ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                        (self.max_rows,)
+                    )
+        except sqlite3.Error as e:
+            print(f"DEBUG: cache store write fail: {e}")
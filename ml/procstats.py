@@ -0,0 +1,49 @@
+"""
+Per-process memory breakdown, used to check that forked workers really share
+the preloaded model pages instead of each holding a private copy.
+
+    python -m ml.procstats <master-pid>     # master + its worker children
+"""
+import os
+import sys
+
+# smaps_rollup fields, in kB
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def process_memory(pid="self"):
+    """RSS split into shared vs private pages (MB), from /proc/<pid>/smaps_rollup. Linux only."""
+    stats = {"pid": os.getpid() if pid == "self" else int(pid)}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in FIELDS:
+                    stats[name.lower() + "_mb"] = round(int(rest.split()[0]) / 1024.0, 1)
+    except (OSError, ValueError):
+        return stats
+    stats["shared_mb"] = round(stats.get("shared_clean_mb", 0) + stats.get("shared_dirty_mb", 0), 1)
+    stats["private_mb"] = round(stats.get("private_clean_mb", 0) + stats.get("private_dirty_mb", 0), 1)
+    return stats
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+if __name__ == "__main__":
+    master = sys.argv[1] if len(sys.argv) > 1 else "self"
+    rows = [("master", process_memory(master))]
+    if master != "self":
+        rows += [("worker", process_memory(p)) for p in child_pids(master)]
+
+    print(f"{'role':<8} {'pid':>8} {'rss MB':>9} {'pss MB':>9} {'shared MB':>10} {'private MB':>11}")
+    for role, m in rows:
+        print(f"{role:<8} {m['pid']:>8} {m.get('rss_mb', 0):>9.1f} {m.get('pss_mb', 0):>9.1f} "
+              f"{m.get('shared_mb', 0):>10.1f} {m.get('private_mb', 0):>11.1f}")
+    total_pss = sum(m.get("pss_mb", 0) for _, m in rows)
+    print(f"Total PSS (actual memory used by all processes): {total_pss:.1f} MB")
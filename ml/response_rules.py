@@ -0,0 +1,43 @@
+# Keyword-specific replies, checked after classification. For each intent the
+# rules are tried top to bottom and the first one with a keyword in the message
+# wins; keywords match anywhere in the lowercased message ("perfumes" hits
+# "perfume"). Adding a category is one more row here, not one more scan.
+RESPONSE_RULES = [
+    {"intent": "product_catalog", "keywords": ["perfume", "fragrance"],
+     "reply": "You can browse our Perfume collection here: [Perfumes](https://example.com/perfumes) 🌸"},
+    {"intent": "product_catalog", "keywords": ["makeup", "lipstick"],
+     "reply": "Check out our latest Makeup trends: [Makeup](https://example.com/makeup) 💄"},
+    {"intent": "product_catalog", "keywords": ["skincare"],
+     "reply": "Explore our Skincare range: [Skincare](https://example.com/skincare) ✨"},
+    {"intent": "product_catalog", "keywords": ["electronics"],
+     "reply": "Discover our Tech & Electronics: [Electronics](https://example.com/electronics) 🎧"},
+    {"intent": "product_care", "keywords": ["leather"],
+     "reply": "For leather: Wipe with a damp cloth and avoid direct heat."},
+    {"intent": "product_care", "keywords": ["cotton"],
+     "reply": "For cotton: Machine wash cold. Tumble dry low."},
+    {"intent": "product_care", "keywords": ["silk", "delicate"],
+     "reply": "For silk: Hand wash cold. Do not wring."},
+]
+
+
+class ResponseRules:
+    """
+    Indexes RESPONSE_RULES by intent. The keywords themselves are matched by
+    ml.entities.EntityExtractor in the same single pass that extracts order
+    numbers and products (pass `keywords` to it), so reply_for() only does set
+    lookups.
+    """
+    def __init__(self, rules=RESPONSE_RULES):
+        self.by_intent = {}
+        self.keywords = set()
+        for rule in rules:
+            kws = frozenset(k.lower() for k in rule["keywords"])
+            self.by_intent.setdefault(rule["intent"], []).append((kws, rule["reply"]))
+            self.keywords |= kws
+
+    def reply_for(self, intent, keywords):
+        """Reply of the first rule for this intent with a keyword in `keywords`, or None."""
+        for kws, reply in self.by_intent.get(intent, ()):
+            if not kws.isdisjoint(keywords):
+                return reply
+        return None
@@ -0,0 +1,81 @@
+"""
+Streaming reader for the UTF-16 review corpus ("__label__<rating> <text>" per
+line) used by train_keras.py. Files are read in byte ranges so parallel
+shards each read their own part of the corpus once.
+"""
+READ_BLOCK = 1 << 20      # bytes per read when scanning a file for lines
+
+
+def iter_lines(path, start, end):
+    """
+    (offset after the line, line) for every line that starts in [start, end)
+    of a UTF-16 file. A line belongs to the range it starts in, so ranges that
+    split a file anywhere cover each line exactly once.
+    """
+    with open(path, "rb") as f:
+        bom = f.read(2)
+        codec = "utf-16-be" if bom == b"\xfe\xff" else "utf-16-le"
+        header = 2 if bom in (b"\xff\xfe", b"\xfe\xff") else 0
+        newline = "\n".encode(codec)
+        # Code units are 2 bytes: align the range to them
+        start = max(start, header)
+        start -= (start - header) % 2
+        end -= (end - header) % 2
+        # Back up one code unit: if it is a newline, a line starts exactly at `start`
+        pos = start - 2 if start > header else start
+        skip = pos < start
+        f.seek(pos)
+        buf, i = b"", 0
+        while pos < end:
+            block = f.read(READ_BLOCK)
+            buf = buf[i:] + block
+            i = 0
+            while pos < end:
+                j = buf.find(newline, i)
+                # 0x0A bytes inside other characters sit at odd offsets
+                while j >= 0 and (j - i) % 2:
+                    j = buf.find(newline, j + 1)
+                if j < 0:
+                    if block:
+                        break
+                    j = len(buf) - 2
+                    if j < i:
+                        return
+                line = buf[i:j + 2]
+                pos += len(line)
+                i = j + 2
+                if skip:
+                    skip = False
+                    continue
+                yield pos, line.decode(codec, errors="ignore")
+            if not block:
+                return
+
+def parse_review(line):
+    """(text, rating) for a "__label__<rating> <text>" line, None otherwise."""
+    if "__label__" not in line:
+        return None
+    parts = line.strip().split(" ", 1)
+    if len(parts) < 2:
+        return None
+    try:
+        return parts[1], int(parts[0].replace("__label__", ""))
+    except ValueError:
+        return None
+
+def iter_reviews(spans):
+    """(text, rating, span index, offset after the line) for each labelled line of the (path, start, end) spans."""
+    for k, (path, start, end) in enumerate(spans):
+        for offset, line in iter_lines(path, start, end):
+            review = parse_review(line)
+            if review:
+                yield review[0], review[1], k, offset
+
+
+def shard_spans(spans, num_shards, shard):
+    """The shard-th of num_shards equal byte ranges of every span."""
+    ranges = []
+    for path, start, end in spans:
+        size = end - start
+        ranges.append((path, start + size * shard // num_shards, start + size * (shard + 1) // num_shards))
+    return ranges
@@ -0,0 +1,340 @@
+"""
+Pure-NumPy sentiment engine.
+
+Exports the Embedding / Bidirectional(LSTM) / Dense weights of the Keras model
+trained in train_keras.py to .npy files and runs the same forward pass with
+NumPy, so web workers can serve the LSTM without importing TensorFlow
+(SENTIMENT_ENGINE=numpy).
+
+Export from the current artifacts (run from the repository root):
+
+    python -m ml.sentiment_numpy
+"""
+import json
+import os
+
+import numpy as np
+
+WEIGHTS_DIR = os.path.join(os.path.dirname(__file__), "sentiment_weights")
+
+
+def export_sentiment_weights(model, tokenizer, encoder, out_dir=WEIGHTS_DIR):
+    """Dumps the layer weights, truncated tokenizer vocabulary and class labels to out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    layers = []
+    for i, layer in enumerate(model.layers):
+        kind = type(layer).__name__
+        prefix = f"{i:02d}_{layer.name}"
+        if kind == "Embedding":
+            np.save(os.path.join(out_dir, f"{prefix}_embeddings.npy"), layer.get_weights()[0].astype(np.float32))
+            layers.append({"type": "embedding", "prefix": prefix, "mask_zero": bool(layer.mask_zero)})
+        elif kind == "Bidirectional":
+            if layer.merge_mode != "concat":
+                raise ValueError(f"Unsupported merge_mode {layer.merge_mode!r} in {layer.name}")
+            for direction, cell in (("forward", layer.forward_layer), ("backward", layer.backward_layer)):
+                _check_lstm(cell)
+                kernel, recurrent, bias = cell.get_weights()
+                np.save(os.path.join(out_dir, f"{prefix}_{direction}_kernel.npy"), kernel.astype(np.float32))
+                np.save(os.path.join(out_dir, f"{prefix}_{direction}_recurrent.npy"), recurrent.astype(np.float32))
+                np.save(os.path.join(out_dir, f"{prefix}_{direction}_bias.npy"), bias.astype(np.float32))
+            layers.append({
+                "type": "bilstm", "prefix": prefix,
+                "return_sequences": bool(layer.return_sequences)
+            })
+        elif kind == "Dense":
+            kernel, bias = layer.get_weights()
+            np.save(os.path.join(out_dir, f"{prefix}_kernel.npy"), kernel.astype(np.float32))
+            np.save(os.path.join(out_dir, f"{prefix}_bias.npy"), bias.astype(np.float32))
+            layers.append({"type": "dense", "prefix": prefix, "activation": layer.activation.__name__})
+        elif kind == "Dropout":
+            continue  # identity at inference
+        else:
+            raise ValueError(f"Unsupported layer {kind} ({layer.name})")
+
+    TokenLookup.from_keras(tokenizer).save(out_dir)
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "layers": layers,
+            "classes": [str(c) for c in encoder.classes_],
+            "oov_index": tokenizer.word_index.get(tokenizer.oov_token) if tokenizer.oov_token else None,
+            "filters": tokenizer.filters,
+            "lower": bool(tokenizer.lower),
+            "split": tokenizer.split
+        }, f, indent=2)
+    print(f"✅ NumPy sentiment weights exported to {out_dir} ({len(layers)} layers)")
+
+
+def _check_lstm(cell):
+    if type(cell).__name__ != "LSTM":
+        raise ValueError(f"Unsupported recurrent layer {type(cell).__name__}")
+    if cell.activation.__name__ != "tanh" or cell.recurrent_activation.__name__ != "sigmoid":
+        raise ValueError("Only tanh/sigmoid LSTM activations are supported")
+    if not cell.use_bias:
+        raise ValueError("LSTM without bias is not supported")
+
+
+def weights_exist(path=WEIGHTS_DIR):
+    return os.path.exists(os.path.join(path, "meta.json"))
+
+
+def pad_sequences(sequences, maxlen):
+    """Pre-pads / pre-truncates like keras pad_sequences defaults."""
+    X = np.zeros((len(sequences), maxlen), dtype=np.int32)
+    for row, seq in enumerate(sequences):
+        seq = seq[-maxlen:]
+        if len(seq):
+            X[row, maxlen - len(seq):] = seq
+    return X
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _softmax(x):
+    x = x - x.max(axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    return x / x.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "sigmoid": _sigmoid,
+    "softmax": _softmax,
+    "tanh": np.tanh,
+}
+
+
+class TokenLookup:
+    """
+    Same word -> id mapping as the Keras Tokenizer (vocabulary truncated to
+    num_words, unknown words -> oov_index), stored as a sorted array of words
+    plus their ids. Both arrays are .npy files that load memory-mapped, and a
+    whole batch is looked up with one np.searchsorted instead of a dict lookup
+    per word. encode() writes straight into a preallocated int32 matrix.
+    """
+    def __init__(self, words, ids, oov_index, filters, lower=True, split=" "):
+        self.words = words
+        self.ids = ids
+        self.oov_index = oov_index
+        self.lower = lower
+        self.split = split
+        self._table = str.maketrans({c: split for c in filters})
+
+    @classmethod
+    def from_word_index(cls, word_index, oov_index, filters, lower=True, split=" ", num_words=None):
+        items = sorted((w, i) for w, i in word_index.items() if not num_words or i < num_words)
+        words = np.array([w for w, _ in items]) if items else np.zeros(0, dtype="<U1")
+        ids = np.array([i for _, i in items], dtype=np.int32)
+        return cls(words, ids, oov_index, filters, lower=lower, split=split)
+
+    @classmethod
+    def from_keras(cls, tokenizer):
+        oov_index = tokenizer.word_index.get(tokenizer.oov_token) if tokenizer.oov_token else None
+        return cls.from_word_index(tokenizer.word_index, oov_index, tokenizer.filters,
+                                   lower=tokenizer.lower, split=tokenizer.split, num_words=tokenizer.num_words)
+
+    def save(self, out_dir):
+        np.save(os.path.join(out_dir, "vocab_words.npy"), self.words)
+        np.save(os.path.join(out_dir, "vocab_ids.npy"), self.ids)
+
+    @classmethod
+    def load(cls, path, meta, mmap_mode=None):
+        options = {"filters": meta["filters"], "lower": meta["lower"], "split": meta["split"]}
+        if not os.path.exists(os.path.join(path, "vocab_words.npy")):
+            # Exports from before the sorted-array lookup
+            with open(os.path.join(path, "word_index.json"), encoding="utf-8") as f:
+                return cls.from_word_index(json.load(f), meta["oov_index"], **options)
+        return cls(
+            np.load(os.path.join(path, "vocab_words.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, "vocab_ids.npy"), mmap_mode=mmap_mode),
+            meta["oov_index"], **options
+        )
+
+    def _words(self, text):
+        if self.lower:
+            text = text.lower()
+        return [w for w in text.translate(self._table).split(self.split) if w]
+
+    def lookup(self, words):
+        """int32 ids of a flat list of words; -1 for unknown words when there is no OOV id."""
+        if not words or not len(self.words):
+            return np.full(len(words), -1 if self.oov_index is None else self.oov_index, dtype=np.int32)
+        query = np.array(words)
+        pos = np.searchsorted(self.words, query)
+        np.minimum(pos, len(self.words) - 1, out=pos)
+        found = self.words[pos] == query
+        return np.where(found, self.ids[pos], -1 if self.oov_index is None else self.oov_index).astype(np.int32)
+
+    def encode(self, texts, maxlen, out=None, normalized=False):
+        """
+        Token ids of `texts` as a (len(texts), maxlen) int32 matrix, pre-padded
+        and pre-truncated like pad_sequences, plus the untruncated length of
+        each sequence (0 when no word is known). Since rows are right-aligned,
+        X[:, -n:] is the same batch padded to n for every row with length <= n.
+        Pass `out` to reuse a buffer. normalized=True skips lowercasing and the
+        filters for text that is already normalize_sentiment output (lowercase
+        letters and spaces), where a plain split gives the same words.
+        """
+        n = len(texts)
+        X = np.zeros((n, maxlen), dtype=np.int32) if out is None else out[:n, :maxlen]
+        if out is not None:
+            X[:] = 0
+        per_text = [t.split() for t in texts] if normalized else [self._words(t) for t in texts]
+        if n == 1:
+            # Single message (the common /predict case): skip the row bookkeeping
+            ids = self.lookup(per_text[0])
+            if self.oov_index is None:
+                ids = ids[ids >= 0]
+            keep = min(len(ids), maxlen)
+            if keep:
+                X[0, maxlen - keep:] = ids[len(ids) - keep:]
+            return X, np.array([len(ids)], dtype=np.int64)
+        counts = np.fromiter((len(w) for w in per_text), dtype=np.int64, count=n)
+        ids = self.lookup([w for words in per_text for w in words])
+        rows = np.repeat(np.arange(n), counts)
+        if self.oov_index is None:
+            # Keras drops unknown words when there is no OOV token
+            known = ids >= 0
+            ids, rows = ids[known], rows[known]
+            counts = np.bincount(rows, minlength=n)
+        starts = np.cumsum(counts) - counts
+        cols = np.arange(len(ids)) - starts[rows] + (maxlen - counts[rows])
+        keep = cols >= 0
+        X[rows[keep], cols[keep]] = ids[keep]
+        return X, counts
+
+    def texts_to_sequences(self, texts):
+        X, counts = self.encode(texts, max(1, max((len(self._words(t)) for t in texts), default=1)))
+        return [X[row, X.shape[1] - count:].tolist() if count else [] for row, count in enumerate(counts)]
+
+
+class LabelDecoder:
+    """Minimal stand-in for the pickled LabelEncoder."""
+    def __init__(self, classes):
+        self.classes_ = np.array(classes)
+
+    def inverse_transform(self, idx):
+        return self.classes_[np.asarray(idx)]
+
+
+class NumpySentimentModel:
+    """
+    Forward pass of the exported Sequential model. `predict` mirrors the
+    Keras signature so MLService can use either engine interchangeably.
+    """
+    def __init__(self, path=WEIGHTS_DIR, mmap_mode=None):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+        self.layers = []
+        self.mask_zero = False
+        for spec in self.meta["layers"]:
+            prefix = spec["prefix"]
+            if spec["type"] == "embedding":
+                self.layers.append(("embedding", load(f"{prefix}_embeddings")))
+                self.mask_zero = spec.get("mask_zero", False)
+            elif spec["type"] == "bilstm":
+                weights = {
+                    direction: (
+                        load(f"{prefix}_{direction}_kernel"),
+                        load(f"{prefix}_{direction}_recurrent"),
+                        load(f"{prefix}_{direction}_bias")
+                    )
+                    for direction in ("forward", "backward")
+                }
+                self.layers.append(("bilstm", (weights, spec["return_sequences"])))
+            elif spec["type"] == "dense":
+                self.layers.append(("dense", (load(f"{prefix}_kernel"), load(f"{prefix}_bias"), spec["activation"])))
+
+    def tokenizer(self):
+        return TokenLookup.load(self.path, self.meta, mmap_mode=self.mmap_mode)
+
+    def label_decoder(self):
+        return LabelDecoder(self.meta["classes"])
+
+    @staticmethod
+    def _lstm(x, kernel, recurrent, bias, mask=None, reverse=False, return_sequences=False):
+        batch, steps, _ = x.shape
+        units = recurrent.shape[0]
+        # Input projection for every timestep in one matmul; only h @ U stays in the loop
+        z_in = (x.reshape(batch * steps, -1) @ kernel + bias).reshape(batch, steps, 4 * units)
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, steps, units), dtype=np.float32) if return_sequences else None
+        order = range(steps - 1, -1, -1) if reverse else range(steps)
+        for t in order:
+            z = z_in[:, t] + h @ recurrent
+            i = _sigmoid(z[:, :units])
+            f = _sigmoid(z[:, units:2 * units])
+            g = np.tanh(z[:, 2 * units:3 * units])
+            o = _sigmoid(z[:, 3 * units:])
+            if mask is None:
+                c = f * c + i * g
+                h = o * np.tanh(c)
+            else:
+                # Masked (padding) steps carry the previous state through, as in Keras
+                step = mask[:, t, None]
+                c = np.where(step, f * c + i * g, c)
+                h = np.where(step, o * np.tanh(c), h)
+            if return_sequences:
+                outputs[:, t] = h
+        return outputs if return_sequences else h
+
+    def predict(self, X, batch_size=256, verbose=0):
+        X = np.asarray(X)
+        return np.concatenate([
+            self._forward(X[start:start + batch_size])
+            for start in range(0, len(X), batch_size)
+        ]) if len(X) else np.zeros((0, len(self.meta["classes"])), dtype=np.float32)
+
+    def _forward(self, X):
+        out = X
+        mask = (X != 0) if self.mask_zero else None
+        for kind, params in self.layers:
+            if kind == "embedding":
+                out = params[X]
+            elif kind == "bilstm":
+                weights, return_sequences = params
+                forward = self._lstm(out, *weights["forward"], mask=mask, return_sequences=return_sequences)
+                backward = self._lstm(out, *weights["backward"], mask=mask, reverse=True,
+                                      return_sequences=return_sequences)
+                out = np.concatenate([forward, backward], axis=-1)
+            elif kind == "dense":
+                kernel, bias, activation = params
+                out = ACTIVATIONS[activation](out @ kernel + bias)
+        return out
+
+
+def max_abs_diff(keras_model, numpy_model, X):
+    """Largest absolute difference between the two engines' probabilities on X."""
+    expected = keras_model.predict(X, verbose=0)
+    actual = numpy_model.predict(X)
+    return float(np.abs(expected - actual).max()), float(np.mean(expected.argmax(1) == actual.argmax(1)))
+
+
+if __name__ == "__main__":
+    import pickle
+    from keras.models import load_model
+
+    base_path = os.path.dirname(__file__)
+    root_path = os.path.join(base_path, "..")
+    keras_model = load_model(os.path.join(root_path, "sentiment_model.keras"))
+    with open(os.path.join(base_path, "tokenizer.pkl"), "rb") as f:
+        keras_tokenizer = pickle.load(f)
+    with open(os.path.join(root_path, "sentiment_label_encoder.pkl"), "rb") as f:
+        label_encoder = pickle.load(f)
+    export_sentiment_weights(keras_model, keras_tokenizer, label_encoder)
+
+    # Sanity check on random token sequences (train_keras.py checks the held-out set)
+    rng = np.random.default_rng(0)
+    vocab_size = keras_model.layers[0].get_weights()[0].shape[0]
+    X = pad_sequences([rng.integers(1, vocab_size, rng.integers(1, 100)) for _ in range(256)], 100)
+    diff, agreement = max_abs_diff(keras_model, NumpySentimentModel(), X)
+    print(f"max |p_keras - p_numpy| = {diff:.2e}, label agreement {agreement:.2%}")
@@ -0,0 +1,78 @@
+"""
+Text normalization shared by training and serving.
+
+Each cleaning step is a single C-level pass instead of a regex scan: a
+precompiled str.translate table for character filtering, str.split for
+whitespace and str.replace for line breaks (two replaces beat translate
+with a two-entry table, which falls off the ASCII fast path):
+
+    normalize_sentiment(text)    == re.sub(r"[^a-zA-Z ]", "", text.lower())   LSTM input
+    normalize_intent(text)       == text.lower()                              TF-IDF input
+    collapse_whitespace(text)    == re.sub(r"\\s+", " ", text).strip()          dataset rows
+    single_line(text)            == text.replace("\\n", " ").replace("\\r", " ").strip()
+
+train_keras.py and MLService both call normalize_sentiment, so a message is
+turned into exactly the same tokens at training and at serving time. Each
+function has a *_batch twin for lists.
+"""
+
+KEEP_SENTIMENT = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ ")
+
+
+class CharTable(dict):
+    """
+    str.translate table that lowercases a character and drops whatever is not
+    in `keep`. Entries are computed on first sight (__missing__) and cached, so
+    the table only grows with the characters actually seen; ASCII is prebuilt.
+    Lowercasing character by character matches str.lower() on the whole string
+    for everything that survives the filter (only Greek final sigma depends on
+    context, and it is dropped either way).
+    """
+    def __init__(self, keep):
+        super().__init__()
+        self.keep = keep
+        for code in range(128):
+            self[code] = self.__missing__(code)
+
+    def __missing__(self, code):
+        kept = "".join(c for c in chr(code).lower() if c in self.keep)
+        # None deletes the character
+        value = kept or None
+        self[code] = value
+        return value
+
+
+SENTIMENT_TABLE = CharTable(KEEP_SENTIMENT)
+
+
+def normalize_sentiment(text):
+    return text.translate(SENTIMENT_TABLE)
+
+
+def normalize_sentiment_batch(texts):
+    table = SENTIMENT_TABLE
+    return [t.translate(table) for t in texts]
+
+
+def normalize_intent(text):
+    return text.lower()
+
+
+def normalize_intent_batch(texts):
+    return [t.lower() for t in texts]
+
+
+def collapse_whitespace(text):
+    return " ".join(text.split())
+
+
+def collapse_whitespace_batch(texts):
+    return [" ".join(t.split()) for t in texts]
+
+
+def single_line(text):
+    return text.replace("\n", " ").replace("\r", " ").strip()
+
+
+def single_line_batch(texts):
+    return [t.replace("\n", " ").replace("\r", " ").strip() for t in texts]
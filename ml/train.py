@@ -1,48 +1,122 @@
+import argparse
+import json
 import pickle
-from sklearn.feature_extraction.text import TfidfVectorizer
+import time
+from datetime import datetime
+from sklearn.base import clone
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_score
+from sklearn.pipeline import make_pipeline
 
+import numpy as np
 import pandas as pd
 import os
 
-# --- LOAD CONSOLIDATED DATASET ---
-csv_path = "chatbot_training_data.csv"
-if not os.path.exists(csv_path):
-    csv_path = "ml/chatbot_training_data.csv"
+try:
+    from ml.intent_kernel import export_intent_kernel, model_digest
+except ImportError:  # run as a script: python ml/train.py
+    from intent_kernel import export_intent_kernel, model_digest
 
-if os.path.exists(csv_path):
-    print(f"Loading data from {csv_path}...")
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_training_data(csv_path):
     df = pd.read_csv(csv_path)
     # Ensure no NaN values
     df = df.dropna(subset=['text', 'intent'])
-    
-    texts = df['text'].astype(str).tolist()
-    labels = df['intent'].tolist()
-    
-    print(f"Loaded {len(texts)} samples from unified CSV.")
-else:
-    print(f"ERROR: {csv_path} not found!")
-    exit(1)
-
-# Training logic
-vectorizer = TfidfVectorizer()
-X = vectorizer.fit_transform(texts)
-
-# Using balanced class weights to handle slight imbalances
-model = LogisticRegression(class_weight='balanced', max_iter=1000)
-model.fit(X, labels)
-
-pickle.dump(model, open("model.pkl", "wb"))
-pickle.dump(vectorizer, open("vectorizer.pkl", "wb"))
+    return df['text'].astype(str).tolist(), df['intent'].tolist()
 
-from sklearn.model_selection import cross_val_score
-import numpy as np
+def train_intent_model(texts, labels, cv=5, n_jobs=-1):
+    """
+    Fits TF-IDF + LogisticRegression; returns (vectorizer, model, report).
+
+    The texts are tokenized and counted once. The folds cross-validate
+    TfidfTransformer + LogisticRegression on those counts, so the IDF weights
+    are refit on each training fold (no leak from the held-out fold) without
+    re-tokenizing. Folds run on n_jobs cores; cv=0 skips cross-validation.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    counter = CountVectorizer()
+    counts = counter.fit_transform(texts)
+    tfidf = TfidfTransformer().fit(counts)
+    X = tfidf.transform(counts)
+    # The served vectorizer: same vocabulary and IDF as a TfidfVectorizer fitted on texts
+    vectorizer = TfidfVectorizer(vocabulary=counter.vocabulary_)
+    vectorizer.idf_ = tfidf.idf_
+    timings["vectorize"] = time.perf_counter() - start
+
+    # Using balanced class weights to handle slight imbalances
+    model = LogisticRegression(class_weight='balanced', max_iter=1000)
+    start = time.perf_counter()
+    model.fit(X, labels)
+    timings["fit"] = time.perf_counter() - start
+
+    report = {
+        "samples": len(texts),
+        "classes": len(model.classes_),
+        "features": X.shape[1],
+        "nnz": int(X.nnz),
+        "sparsity": round(1.0 - X.nnz / float(X.shape[0] * X.shape[1]), 6) if X.shape[0] else None
+    }
+    if cv:
+        # Cross-Validation for Accuracy
+        start = time.perf_counter()
+        estimator = make_pipeline(TfidfTransformer(), clone(model))
+        scores = cross_val_score(estimator, counts, labels, cv=cv, n_jobs=n_jobs)
+        timings["cv"] = time.perf_counter() - start
+        report["cv_accuracy"] = float(np.mean(scores))
+        report["cv_scores"] = [round(float(x), 4) for x in scores]
+    report["timings"] = {k: round(v, 3) for k, v in timings.items()}
+    return vectorizer, model, report
+
+def save_intent_model(vectorizer, model, out_dir=ML_DIR, report=None):
+    start = time.perf_counter()
+    with open(os.path.join(out_dir, "model.pkl"), "wb") as f:
+        pickle.dump(model, f)
+    with open(os.path.join(out_dir, "vectorizer.pkl"), "wb") as f:
+        pickle.dump(vectorizer, f)
+    # Compact NumPy artifact for serving without scikit-learn (INTENT_ENGINE=compiled)
+    export_intent_kernel(vectorizer, model, out_dir=os.path.join(out_dir, "intent_kernel"),
+                         source_digest=model_digest(os.path.join(out_dir, "model.pkl")))
+    if report is not None:
+        report["timings"]["save"] = round(time.perf_counter() - start, 3)
+        report["trained_at"] = datetime.now().isoformat(timespec="seconds")
+        with open(os.path.join(out_dir, "training_report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+def print_metrics(metrics):
+    print("Model trained successfully!")
+    if "cv_accuracy" in metrics:
+        print(f"Mean Cross-Validation Accuracy: {metrics['cv_accuracy']:.2%}")
+    print(f"Total samples: {metrics['samples']}")
+    print(f"Intent classes: {metrics['classes']}")
+    if "timings" in metrics:
+        print("Timings: " + ", ".join(f"{k} {v:.2f}s" for k, v in metrics["timings"].items()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the intent model")
+    parser.add_argument("--no-cv", action="store_true", help="skip cross-validation (fast retrain)")
+    parser.add_argument("--cv", type=int, default=5, help="number of folds")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores for the CV folds (-1 = all)")
+    args = parser.parse_args()
+
+    # --- LOAD CONSOLIDATED DATASET ---
+    csv_path = "chatbot_training_data.csv"
+    if not os.path.exists(csv_path):
+        csv_path = "ml/chatbot_training_data.csv"
 
-# Cross-Validation for Accuracy
-scores = cross_val_score(model, X, labels, cv=5)
-mean_accuracy = np.mean(scores)
+    if os.path.exists(csv_path):
+        print(f"Loading data from {csv_path}...")
+        texts, labels = load_training_data(csv_path)
+        print(f"Loaded {len(texts)} samples from unified CSV.")
+    else:
+        print(f"ERROR: {csv_path} not found!")
+        exit(1)
 
-print("Model trained successfully!")
-print(f"Mean Cross-Validation Accuracy: {mean_accuracy:.2%}")
-print(f"Total samples: {len(texts)}")
-print(f"Intent classes: {len(model.classes_)}")
+    vectorizer, model, report = train_intent_model(
+        texts, labels, cv=0 if args.no_cv else args.cv, n_jobs=args.n_jobs
+    )
+    save_intent_model(vectorizer, model, report=report)
+    print_metrics(report)
@@ -0,0 +1,259 @@
+"""
+Incremental intent training.
+
+train.py refits TF-IDF + LogisticRegression on the whole corpus. This script
+keeps a HashingVectorizer (a fixed feature space, so nothing has to be refit
+when new words appear) + SGDClassifier model in ml/incremental/ and updates it
+with partial_fit on only the rows appended to user_contributions.csv since the
+last run. Run from the repository root:
+
+    python -m ml.train_incremental --bootstrap     # initial model from chatbot_training_data.csv
+    python -m ml.train_incremental                 # fold in new user contributions
+    python -m ml.train_incremental --promote       # ...and serve it if accuracy held up
+
+Every run scores the model on a fixed holdout and, unless --no-baseline, also
+refits the full TF-IDF + LR pipeline on the same split, so the accuracy delta
+is tracked in ml/incremental/state.json.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import pickle
+import random
+import shutil
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from ml.intents import ALLOWED_INTENTS
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+INCREMENTAL_DIR = os.path.join(ML_DIR, "incremental")
+STATE_PATH = os.path.join(INCREMENTAL_DIR, "state.json")
+TRAINING_CSV = os.path.join(ML_DIR, "chatbot_training_data.csv")
+CONTRIBUTIONS_CSV = os.path.join(ML_DIR, "data", "user_contributions.csv")
+
+N_FEATURES = 2 ** 18
+# Every intent the aggregator can emit, so partial_fit never meets an unknown class
+CLASSES = np.array(sorted(ALLOWED_INTENTS))
+HOLDOUT_PERCENT = 20
+BATCH_SIZE = 1024
+
+
+def make_vectorizer():
+    return HashingVectorizer(n_features=N_FEATURES, alternate_sign=False, norm="l2")
+
+
+def make_model():
+    return SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42)
+
+
+def in_holdout(text):
+    """Stable train/holdout split by text hash, so a message never moves between them across runs."""
+    digest = hashlib.blake2b(text.lower().encode("utf-8"), digest_size=2).digest()
+    return int.from_bytes(digest, "big") % 100 < HOLDOUT_PERCENT
+
+
+def read_rows(path, skip=0):
+    """(text, intent) rows of a training CSV with a known intent, starting after `skip` data rows."""
+    rows = []
+    if not os.path.exists(path):
+        return rows, 0
+    total = 0
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            total += 1
+            if total <= skip:
+                continue
+            text, intent = row.get("text"), row.get("intent")
+            if text and intent in ALLOWED_INTENTS:
+                rows.append((str(text), intent))
+    return rows, total
+
+
+def rows_digest(path, count):
+    """Digest of the first `count` data rows, so a rewritten CSV is told apart from one that only grew."""
+    h = hashlib.blake2b(digest_size=16)
+    if count and os.path.exists(path):
+        with open(path, newline="", encoding="utf-8") as f:
+            # Same rows as read_rows counts (DictReader skips blank lines)
+            for n, row in enumerate(csv.DictReader(f), 1):
+                h.update("\x00".join(str(v) for v in row.values()).encode("utf-8") + b"\n")
+                if n >= count:
+                    break
+    return h.hexdigest()
+
+
+def split(rows):
+    train, holdout = [], []
+    for row in rows:
+        (holdout if in_holdout(row[0]) else train).append(row)
+    return train, holdout
+
+
+def fit_epochs(vectorizer, model, rows, epochs, seed=42):
+    rng = random.Random(seed)
+    rows = list(rows)
+    for _ in range(epochs):
+        rng.shuffle(rows)
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            X = vectorizer.transform([t for t, _ in batch])
+            model.partial_fit(X, [i for _, i in batch], classes=CLASSES)
+
+
+def accuracy(predict, holdout):
+    if not holdout:
+        return None
+    predicted = predict([t for t, _ in holdout])
+    return float(np.mean([p == i for p, (_, i) in zip(predicted, holdout)]))
+
+
+def baseline_accuracy(train, holdout):
+    """Accuracy of the full TF-IDF + LR refit (what train.py does) on the same split."""
+    vectorizer = TfidfVectorizer()
+    model = LogisticRegression(class_weight="balanced", max_iter=1000)
+    model.fit(vectorizer.fit_transform([t for t, _ in train]), [i for _, i in train])
+    return accuracy(lambda texts: model.predict(vectorizer.transform(texts)), holdout)
+
+
+def load_state():
+    try:
+        with open(STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"version": 0, "contribution_rows": 0, "history": []}
+
+
+def save_artifacts(vectorizer, model, state):
+    os.makedirs(INCREMENTAL_DIR, exist_ok=True)
+    with open(os.path.join(INCREMENTAL_DIR, "model.pkl"), "wb") as f:
+        pickle.dump(model, f)
+    with open(os.path.join(INCREMENTAL_DIR, "vectorizer.pkl"), "wb") as f:
+        pickle.dump(vectorizer, f)
+    with open(STATE_PATH, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def load_artifacts():
+    with open(os.path.join(INCREMENTAL_DIR, "model.pkl"), "rb") as f:
+        model = pickle.load(f)
+    with open(os.path.join(INCREMENTAL_DIR, "vectorizer.pkl"), "rb") as f:
+        vectorizer = pickle.load(f)
+    return vectorizer, model
+
+
+def promote():
+    """Copies the incremental model over ml/model.pkl + vectorizer.pkl for MLService to serve."""
+    for name in ("model.pkl", "vectorizer.pkl"):
+        shutil.copyfile(os.path.join(INCREMENTAL_DIR, name), os.path.join(ML_DIR, name))
+    # The compiled kernel only supports TF-IDF. Its meta.json records the digest of the
+    # model.pkl it was exported from, so MLService sees it is stale and serves the pickles
+    # until train.py exports a fresh one on the next full refit.
+    print("✅ Promoted incremental intent model to ml/model.pkl")
+
+
+def train(bootstrap=False, epochs=3, replay_ratio=2.0, with_baseline=True):
+    state = load_state()
+    base_rows, _ = read_rows(TRAINING_CSV)
+    base_train, base_holdout = split(base_rows)
+
+    start = time.perf_counter()
+    if bootstrap or not os.path.exists(os.path.join(INCREMENTAL_DIR, "model.pkl")):
+        mode = "bootstrap"
+        print(f"Bootstrapping from {TRAINING_CSV} ({len(base_train)} training rows)...")
+        vectorizer, model = make_vectorizer(), make_model()
+        fit_epochs(vectorizer, model, base_train, epochs=max(epochs, 5))
+        # Contributions already present are assumed to be folded into the training CSV
+        _, state["contribution_rows"] = read_rows(CONTRIBUTIONS_CSV)
+        state["contribution_digest"] = rows_digest(CONTRIBUTIONS_CSV, state["contribution_rows"])
+        new_train = []
+    else:
+        mode = "incremental"
+        vectorizer, model = load_artifacts()
+        skip = state.get("contribution_rows", 0)
+        marker = state.get("contribution_digest")
+        new_rows, total = read_rows(CONTRIBUTIONS_CSV, skip=skip)
+        if total < skip or (skip and marker and rows_digest(CONTRIBUTIONS_CSV, skip) != marker):
+            # The export was rebuilt (orchestrate_retrain.py --full): the rows already
+            # trained on are no longer its first `skip` rows, so start over on it
+            print("⚠️ user_contributions.csv was rewritten; re-reading it from the start")
+            new_rows, total = read_rows(CONTRIBUTIONS_CSV)
+        new_train, _ = split(new_rows)
+        if not new_train:
+            print("⚠️ No new contribution rows to train on.")
+            return None
+        # Mix in a sample of the base data so the update does not forget older intents
+        rng = random.Random(state["version"])
+        replay = rng.sample(base_train, min(len(base_train), int(len(new_train) * replay_ratio)))
+        print(f"Updating with {len(new_train)} new rows (+{len(replay)} replayed)...")
+        fit_epochs(vectorizer, model, new_train + replay, epochs)
+        state["contribution_rows"] = total
+        state["contribution_digest"] = rows_digest(CONTRIBUTIONS_CSV, total)
+    train_seconds = time.perf_counter() - start
+
+    # Holdout: base holdout plus the holdout share of every contribution seen so far
+    contrib_rows, _ = read_rows(CONTRIBUTIONS_CSV)
+    contrib_train, contrib_holdout = split(contrib_rows)
+    holdout = base_holdout + contrib_holdout
+    acc = accuracy(lambda texts: model.predict(vectorizer.transform(texts)), holdout)
+
+    entry = {
+        "version": state["version"] + 1,
+        "mode": mode,
+        "new_rows": len(new_train),
+        "train_seconds": round(train_seconds, 3),
+        "holdout_rows": len(holdout),
+        "accuracy": acc
+    }
+    if with_baseline and holdout:
+        start = time.perf_counter()
+        entry["baseline_accuracy"] = baseline_accuracy(base_train + contrib_train, holdout)
+        entry["baseline_seconds"] = round(time.perf_counter() - start, 3)
+        entry["accuracy_delta"] = round(acc - entry["baseline_accuracy"], 4)
+
+    state["version"] = entry["version"]
+    state["history"] = (state.get("history", []) + [entry])[-50:]
+    save_artifacts(vectorizer, model, state)
+
+    print(f"✅ Incremental model v{entry['version']} trained in {entry['train_seconds']:.2f}s")
+    if acc is not None:
+        print(f"Holdout accuracy: {acc:.2%} ({len(holdout)} rows)")
+    if "baseline_accuracy" in entry:
+        print(f"Full refit baseline: {entry['baseline_accuracy']:.2%} in {entry['baseline_seconds']:.2f}s "
+              f"(delta {entry['accuracy_delta']:+.2%})")
+    return entry
+
+
+def train_and_promote(bootstrap=False, epochs=3, replay_ratio=2.0, with_baseline=True, max_drop=0.02):
+    """train(), then promote() unless accuracy fell more than max_drop below the full refit."""
+    entry = train(bootstrap, epochs, replay_ratio, with_baseline)
+    if not entry:
+        return None
+    if entry.get("accuracy_delta", 0.0) < -max_drop:
+        print(f"❌ Not promoting: accuracy {entry['accuracy_delta']:+.2%} vs the full refit")
+    else:
+        promote()
+    return entry
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental intent model training")
+    parser.add_argument("--bootstrap", action="store_true", help="train from scratch on chatbot_training_data.csv")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--replay-ratio", type=float, default=2.0,
+                        help="base rows replayed per new row to avoid forgetting")
+    parser.add_argument("--no-baseline", action="store_true", help="skip the full TF-IDF + LR refit comparison")
+    parser.add_argument("--promote", action="store_true", help="serve the new model if accuracy held up")
+    parser.add_argument("--max-drop", type=float, default=0.02,
+                        help="largest accuracy drop vs the baseline that still promotes")
+    args = parser.parse_args()
+
+    if args.promote:
+        train_and_promote(args.bootstrap, args.epochs, args.replay_ratio, not args.no_baseline, args.max_drop)
+    else:
+        train(args.bootstrap, args.epochs, args.replay_ratio, not args.no_baseline)
@@ -1,40 +1,44 @@
-import pandas as pd
+import argparse
+import functools
+import hashlib
+import math
 import os
 import numpy as np
-import re
+import time
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Embedding, LSTM, Bidirectional, Dense, Dropout
+from tensorflow.keras.layers import Input, Embedding, LSTM, Bidirectional, Dense, Dropout
 from tensorflow.keras.preprocessing.text import Tokenizer
 from tensorflow.keras.preprocessing.sequence import pad_sequences
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 import pickle
+from review_corpus import iter_reviews, shard_spans
+from text_normalize import normalize_sentiment
+
+# Streams the review corpus (UTF-16, "__label__<rating> <text>" per line) instead
+# of loading it: one pass fits the tokenizer and counts rows, then every epoch
+# reads the files again through tf.data, tokenizing and padding CHUNK_ROWS at a
+# time in parallel shards. Each shard reads only its own byte range of every
+# file, so the corpus is read once per epoch whatever the shard count. Memory
+# stays flat however large the corpus is.
+#
+#   cd ml && python train_keras.py                        # full data/train_small.txt
+#   python train_keras.py --data reviews-*.txt --limit 0  # any number of files
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_LEN = 100 # Synchronized with ml_service.py
+NUM_WORDS = 30000
+CHUNK_ROWS = 512          # rows one shard tokenizes and pads together
+FIT_CHUNK_ROWS = 50000    # rows per incremental tokenizer.fit_on_texts call
+SHUFFLE_BUFFER = 20000
+HOLDOUT_PERCENT = 20
+CHECKPOINT_DIR = os.path.join(ML_DIR, "checkpoints")
+SENTIMENTS = ["negative", "neutral", "positive"]
 
 # ---------------------------
-# 1. LOAD DATA (Fast Repair Mode)
+# 1. STREAM DATA
 # ---------------------------
-def load_data(path, limit=2000):
-    # Try train_small.txt first as it's cleaner
-    if not os.path.exists(path):
-        path = "data/train_small.txt"
-    if not os.path.exists(path):
-        print("❌ Data file not found!")
-        return [], []
-        
-    texts, labels = [], []
-    with open(path, "r", encoding="utf-16", errors="ignore") as f:
-        for i, line in enumerate(f):
-            if i >= limit: break
-            if "__label__" in line:
-                parts = line.strip().split(" ", 1)
-                label = int(parts[0].replace("__label__", ""))
-                text = parts[1]
-                texts.append(text)
-                labels.append(label)
-    return texts, labels
-
-texts, ratings = load_data("data/train_small.txt")
+# review_corpus.py: iter_reviews() / shard_spans() read the corpus in byte ranges
 
 # ---------------------------
 # 2. MAP TO SENTIMENT
@@ -47,43 +51,146 @@ def map_sentiment(r):
     else:
         return "positive"
 
-sentiments = [map_sentiment(r) for r in ratings]
-
 # ---------------------------
 # 3. CLEAN TEXT
 # ---------------------------
-def clean_text(text):
-    text = text.lower()
-    text = re.sub(r"[^a-zA-Z ]", "", text)
-    return text
-
-texts = [clean_text(t) for t in texts]
-
-# ---------------------------
-# 4. TOKENIZATION
-# ---------------------------
-tokenizer = Tokenizer(num_words=30000, oov_token="<OOV>")
-tokenizer.fit_on_texts(texts)
-
-sequences = tokenizer.texts_to_sequences(texts)
-MAX_LEN = 100 # Synchronized with ml_service.py
-X = pad_sequences(sequences, maxlen=MAX_LEN)
+# Shared with MLService, so serving sees exactly the tokens the model was trained on
+clean_text = normalize_sentiment
+
+def in_holdout(text):
+    """Stable train/validation split by text hash; no list of the corpus is needed to split it."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=2).digest()
+    return int.from_bytes(digest, "big") % 100 < HOLDOUT_PERCENT
+
+# ---------------------------
+# 4. TOKENIZATION (one streaming pass)
+# ---------------------------
+def fit_tokenizer(paths, limit):
+    """
+    Fits the tokenizer chunk by chunk and counts the train/validation rows.
+    Also returns the (path, start, end) spans read, cut after the `limit`-th row,
+    so the training shards read exactly the same rows.
+    """
+    tokenizer = Tokenizer(num_words=NUM_WORDS, oov_token="<OOV>")
+    counts = {"train": 0, "val": 0}
+    spans = [(path, 0, os.path.getsize(path)) for path in paths]
+    chunk = []
+    n = 0
+    for text, _, k, offset in iter_reviews(spans):
+        text = clean_text(text)
+        counts["val" if in_holdout(text) else "train"] += 1
+        chunk.append(text)
+        if len(chunk) >= FIT_CHUNK_ROWS:
+            tokenizer.fit_on_texts(chunk)
+            chunk = []
+        n += 1
+        if limit and n >= limit:
+            spans = spans[:k] + [(spans[k][0], 0, offset)]
+            break
+    if chunk:
+        tokenizer.fit_on_texts(chunk)
+    return tokenizer, counts, spans
+
+def shard_chunks(spans, split, tokenizer, label_ids, num_shards, shard):
+    """Padded (X, y) chunks of one split, from this shard's byte ranges only."""
+    texts, labels = [], []
+    for text, rating, _, _ in iter_reviews(shard_spans(spans, num_shards, int(shard))):
+        text = clean_text(text)
+        if in_holdout(text) != (split == "val"):
+            continue
+        texts.append(text)
+        labels.append(label_ids[map_sentiment(rating)])
+        if len(texts) == CHUNK_ROWS:
+            yield pad_sequences(tokenizer.texts_to_sequences(texts), maxlen=MAX_LEN), np.array(labels, dtype=np.int32)
+            texts, labels = [], []
+    if texts:
+        yield pad_sequences(tokenizer.texts_to_sequences(texts), maxlen=MAX_LEN), np.array(labels, dtype=np.int32)
+
+def make_dataset(spans, split, tokenizer, label_ids, rows, batch_size, num_shards, shuffle):
+    signature = (
+        tf.TensorSpec(shape=(None, MAX_LEN), dtype=tf.int32),
+        tf.TensorSpec(shape=(None,), dtype=tf.int32)
+    )
+    generator = functools.partial(shard_chunks, spans, split, tokenizer, label_ids, num_shards)
+    ds = tf.data.Dataset.range(num_shards).interleave(
+        lambda shard: tf.data.Dataset.from_generator(generator, args=(shard,), output_signature=signature),
+        cycle_length=num_shards,
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not shuffle
+    ).unbatch()
+    if shuffle:
+        ds = ds.shuffle(SHUFFLE_BUFFER, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    # Row counts are known from the tokenizer pass, so Keras can show progress per epoch
+    ds = ds.apply(tf.data.experimental.assert_cardinality(math.ceil(rows / batch_size)))
+    return ds.prefetch(tf.data.AUTOTUNE)
+
+class Throughput(tf.keras.callbacks.Callback):
+    """Prints training samples/sec per epoch (validation time excluded)."""
+    def __init__(self, samples_per_epoch):
+        super().__init__()
+        self.samples = samples_per_epoch
+        self.rates = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.start = time.perf_counter()
+        self.train_seconds = None
+
+    def on_test_begin(self, logs=None):
+        if self.train_seconds is None:
+            self.train_seconds = time.perf_counter() - self.start
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = self.train_seconds or (time.perf_counter() - self.start)
+        rate = self.samples / seconds
+        self.rates.append(rate)
+        print(f"⏱️ Epoch {epoch + 1}: {rate:,.0f} samples/sec ({self.samples} samples in {seconds:.1f}s)")
+
+parser = argparse.ArgumentParser(description="Train the LSTM sentiment model on the streamed review corpus")
+parser.add_argument("--data", nargs="+", default=[os.path.join(ML_DIR, "data", "train_small.txt")],
+                    help="UTF-16 __label__ review files")
+parser.add_argument("--limit", type=int, default=0, help="stop after this many rows (0 = full corpus)")
+parser.add_argument("--epochs", type=int, default=5)
+parser.add_argument("--batch-size", type=int, default=128)
+parser.add_argument("--shards", type=int, default=os.cpu_count() or 1,
+                    help="parallel reader/tokenizer shards")
+parser.add_argument("--checkpoint-every", type=int, default=1000,
+                    help="batches between checkpoints in ml/checkpoints/ (a rerun resumes from the last one)")
+args = parser.parse_args()
+
+paths = [p for p in args.data if os.path.exists(p)]
+if not paths:
+    print("❌ Data file not found!")
+    raise SystemExit(1)
+
+start = time.perf_counter()
+tokenizer, counts, spans = fit_tokenizer(paths, args.limit)
+print(f"✅ Tokenizer fitted on {counts['train'] + counts['val']} rows "
+      f"({len(tokenizer.word_index)} words) in {time.perf_counter() - start:.1f}s")
+if not counts["train"] or not counts["val"]:
+    print("❌ Not enough rows to train and validate!")
+    raise SystemExit(1)
 
 # ---------------------------
 # 5. ENCODE LABELS
 # ---------------------------
 encoder = LabelEncoder()
-y = encoder.fit_transform(sentiments)
+encoder.fit(SENTIMENTS)
+label_ids = {label: i for i, label in enumerate(encoder.classes_)}
 
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
+train_ds = make_dataset(spans, "train", tokenizer, label_ids, counts["train"],
+                        args.batch_size, args.shards, shuffle=True)
+val_ds = make_dataset(spans, "val", tokenizer, label_ids, counts["val"],
+                      args.batch_size, args.shards, shuffle=False)
 
 # ---------------------------
 # 6. BUILD MODEL (RECRUITER LEVEL)
 # ---------------------------
+# Variable-length input with masked padding: serving pads each batch only to the
+# nearest length bucket (16/32/64/100) and gets the same outputs as at MAX_LEN.
 model = Sequential([
-    Embedding(30000, 128, input_length=MAX_LEN),
+    Input(shape=(None,), dtype="int32"),
+    Embedding(NUM_WORDS, 128, mask_zero=True),
     Bidirectional(LSTM(64, return_sequences=True)),
     Dropout(0.3),
     Bidirectional(LSTM(32)),
@@ -103,26 +210,45 @@ model.summary()
 # ---------------------------
 # 7. TRAIN
 # ---------------------------
+throughput = Throughput(counts["train"])
 model.fit(
-    X_train,
-    y_train,
-    epochs=5,
-    batch_size=128,
-    validation_data=(X_test, y_test)
+    train_ds,
+    epochs=args.epochs,
+    validation_data=val_ds,
+    callbacks=[
+        # Saves weights + optimizer state every --checkpoint-every batches; an
+        # interrupted run restarts from there and the backup is removed on success.
+        tf.keras.callbacks.BackupAndRestore(CHECKPOINT_DIR, save_freq=args.checkpoint_every),
+        throughput
+    ]
 )
+print(f"Mean throughput: {np.mean(throughput.rates):,.0f} samples/sec")
 
 # ---------------------------
 # 8. SAVE EVERYTHING (Correct Paths)
 # ---------------------------
 # Model goes to root for app.py
-model.save("../sentiment_model.keras")
+model.save(os.path.join(ML_DIR, "..", "sentiment_model.keras"))
 
 # Tokenizer and Encoder go to ml/ for MLService
-with open("tokenizer.pkl", "wb") as f:
+with open(os.path.join(ML_DIR, "tokenizer.pkl"), "wb") as f:
     pickle.dump(tokenizer, f)
 
-with open("../sentiment_label_encoder.pkl", "wb") as f:
+with open(os.path.join(ML_DIR, "..", "sentiment_label_encoder.pkl"), "wb") as f:
     # Renamed to match ml_service.py expected name
     pickle.dump(encoder, f)
 
+# ---------------------------
+# 9. EXPORT NUMPY ENGINE (SENTIMENT_ENGINE=numpy)
+# ---------------------------
+from sentiment_numpy import export_sentiment_weights, max_abs_diff, NumpySentimentModel
+
+export_sentiment_weights(model, tokenizer, encoder)
+# A bounded slice of the validation stream is enough for the parity check
+X_test = np.concatenate([x for x, _ in val_ds.take(max(1, 2000 // args.batch_size)).as_numpy_iterator()])
+diff, agreement = max_abs_diff(model, NumpySentimentModel(), X_test)
+print(f"NumPy engine vs Keras on held-out set: max |diff| = {diff:.2e}, label agreement {agreement:.2%}")
+if diff > 1e-4:
+    print("⚠️ NumPy engine deviates from Keras beyond tolerance; keep SENTIMENT_ENGINE=keras")
+
 print("✅ Sentiment model repaired and synchronized!")
@@ -0,0 +1,39 @@
+import pickle
+
+import numpy as np
+
+from ml.intent_kernel import CompiledIntentScorer, export_intent_kernel, kernel_is_current, model_digest
+from ml.train import train_intent_model
+
+TEXTS = [
+    "hi there", "hello", "good morning", "hey, how are you?",
+    "where is my order", "track my package #123", "my order hasn't arrived", "shipping status please",
+    "i want a refund", "refund my money", "return this item for a refund", "can I get my money back",
+    "bye", "goodbye!", "see you later", "thanks, bye",
+]
+LABELS = ["greeting"] * 4 + ["order_status"] * 4 + ["refund"] * 4 + ["goodbye"] * 4
+
+
+def test_compiled_kernel_matches_sklearn(tmp_path):
+    vectorizer, model, _ = train_intent_model(TEXTS, LABELS, cv=0)
+    export_intent_kernel(vectorizer, model, out_dir=str(tmp_path / "kernel"))
+    scorer = CompiledIntentScorer(path=str(tmp_path / "kernel"))
+
+    queries = TEXTS + ["HELLO where's my REFUND??", "unknown words only", "", "order order order"]
+    assert list(scorer.classes_) == list(model.classes_)
+    np.testing.assert_allclose(scorer.predict_proba(queries),
+                               model.predict_proba(vectorizer.transform(queries)), atol=1e-6)
+
+
+def test_kernel_goes_stale_when_model_changes(tmp_path):
+    vectorizer, model, _ = train_intent_model(TEXTS, LABELS, cv=0)
+    model_path = tmp_path / "model.pkl"
+    model_path.write_bytes(pickle.dumps(model))
+    export_intent_kernel(vectorizer, model, out_dir=str(tmp_path / "kernel"),
+                         source_digest=model_digest(str(model_path)))
+    assert kernel_is_current(str(model_path), str(tmp_path / "kernel"))
+
+    # e.g. a promoted incremental model
+    _, other, _ = train_intent_model(TEXTS[:12], LABELS[:12], cv=0)
+    model_path.write_bytes(pickle.dumps(other))
+    assert not kernel_is_current(str(model_path), str(tmp_path / "kernel"))
@@ -0,0 +1,95 @@
+import glob
+import json
+import subprocess
+import sys
+
+from ml.interaction_logger import InteractionLogWriter
+
+
+class FakeCollection:
+    """insert_many that fails while `down` is set and records _ids otherwise."""
+    def __init__(self, down=False):
+        self.down = down
+        self.ids = []
+        self.on_insert = None
+
+    def insert_many(self, docs, ordered=True):
+        if self.down:
+            raise ConnectionError("mongo unavailable")
+        if self.on_insert:
+            self.on_insert()
+        self.ids.extend(doc["_id"] for doc in docs)
+
+
+def make_writer(collection, tmp_path):
+    writer = InteractionLogWriter(collection, batch_size=2, flush_interval=0.01,
+                                  spill_path=str(tmp_path / "spill.jsonl"), retry_interval=3600)
+    # Stop the background thread so the test drives flush/replay itself
+    writer.close()
+    return writer
+
+
+def records(start, count):
+    return [{"_id": f"r{i}", "message": f"hello {i}"} for i in range(start, start + count)]
+
+
+def spilled_ids(writer):
+    with open(writer.spill_path, encoding="utf-8") as f:
+        return [json.loads(line)["_id"] for line in f if line.strip()]
+
+
+def test_failed_flush_spills_and_next_flush_replays(tmp_path):
+    collection = FakeCollection(down=True)
+    writer = make_writer(collection, tmp_path)
+
+    writer._flush(records(0, 3))
+    assert collection.ids == []
+    assert spilled_ids(writer) == ["r0", "r1", "r2"]
+
+    collection.down = False
+    writer._flush(records(3, 1))
+    assert sorted(collection.ids) == ["r0", "r1", "r2", "r3"]
+    assert not writer._spill_pending()
+    assert glob.glob(writer.spill_path + ".*.replay") == []
+    assert writer.stats()["replayed"] == 3
+
+
+def test_failed_replay_puts_records_back(tmp_path):
+    collection = FakeCollection(down=True)
+    writer = make_writer(collection, tmp_path)
+    writer._spill(records(0, 2))
+
+    writer._replay()
+    assert spilled_ids(writer) == ["r0", "r1"]
+    assert glob.glob(writer.spill_path + ".*.replay") == []
+
+
+def test_records_spilled_during_replay_are_kept(tmp_path):
+    collection = FakeCollection()
+    writer = make_writer(collection, tmp_path)
+    other = make_writer(FakeCollection(down=True), tmp_path)
+    writer._spill(records(0, 2))
+
+    def spill_from_other_worker():
+        # Another worker spills while this one is replaying its claim
+        if not collection.ids:
+            other._spill(records(10, 1))
+    collection.on_insert = spill_from_other_worker
+
+    writer._replay()
+    assert sorted(collection.ids) == ["r0", "r1"]
+    assert spilled_ids(writer) == ["r10"]
+
+
+def test_claim_of_dead_worker_is_replayed(tmp_path):
+    collection = FakeCollection()
+    writer = make_writer(collection, tmp_path)
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    with open(f"{writer.spill_path}.{dead.pid}.replay", "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(doc) + "\n" for doc in records(0, 2))
+
+    assert writer._spill_pending()
+    writer._replay()
+    assert sorted(collection.ids) == ["r0", "r1"]
+    assert not writer._spill_pending()
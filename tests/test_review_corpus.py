@@ -0,0 +1,58 @@
+import pytest
+
+from ml.review_corpus import iter_lines, iter_reviews, shard_spans
+
+LINES = [
+    "__label__5 Great product, would buy again",
+    "__label__1 Ċarbage ĊĊ",     # U+010A has a 0x0A byte
+    "__label__3 okay \U0001F600 emoji",          # surrogate pair
+    "not a review line",
+    "__label__4 short",
+    "__label__2 " + "long text " * 50,
+]
+
+
+def write_corpus(path, codec, bom, trailing_newline=True):
+    text = "\n".join(LINES) + ("\n" if trailing_newline else "")
+    path.write_bytes(bom + text.encode(codec))
+    return str(path)
+
+
+CORPORA = [
+    ("utf-16-le", b"\xff\xfe", True),
+    ("utf-16-be", b"\xfe\xff", True),
+    ("utf-16-le", b"", True),
+    ("utf-16-le", b"\xff\xfe", False),
+]
+
+
+@pytest.mark.parametrize("codec,bom,trailing_newline", CORPORA)
+def test_iter_lines_reads_every_line(tmp_path, codec, bom, trailing_newline):
+    path = write_corpus(tmp_path / "reviews.txt", codec, bom, trailing_newline)
+    size = (tmp_path / "reviews.txt").stat().st_size
+    lines = [line.rstrip("\n") for _, line in iter_lines(path, 0, size)]
+    assert lines == LINES
+
+
+@pytest.mark.parametrize("codec,bom,trailing_newline", CORPORA)
+@pytest.mark.parametrize("num_shards", [1, 3, 8, 50])
+def test_shards_cover_each_review_once(tmp_path, codec, bom, trailing_newline, num_shards):
+    path = write_corpus(tmp_path / "reviews.txt", codec, bom, trailing_newline)
+    spans = [(path, 0, (tmp_path / "reviews.txt").stat().st_size)]
+    sequential = [(text, rating) for text, rating, _, _ in iter_reviews(spans)]
+    assert [rating for _, rating in sequential] == [5, 1, 3, 4, 2]
+
+    sharded = []
+    for shard in range(num_shards):
+        sharded += [(text, rating) for text, rating, _, _ in iter_reviews(shard_spans(spans, num_shards, shard))]
+    assert sharded == sequential
+
+
+def test_offset_resumes_after_the_line(tmp_path):
+    path = write_corpus(tmp_path / "reviews.txt", "utf-16-le", b"\xff\xfe")
+    end = (tmp_path / "reviews.txt").stat().st_size
+    reviews = list(iter_reviews([(path, 0, end)]))
+    # A span cut at the offset of the second review continues with the third
+    offset = reviews[1][3]
+    rest = [rating for _, rating, _, _ in iter_reviews([(path, offset, end)])]
+    assert rest == [3, 4, 2]
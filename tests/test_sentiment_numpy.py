@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from sklearn.preprocessing import LabelEncoder
+from tensorflow.keras.layers import Input, Embedding, LSTM, Bidirectional, Dense, Dropout
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.preprocessing.sequence import pad_sequences
+from tensorflow.keras.preprocessing.text import Tokenizer
+
+from ml.sentiment_numpy import NumpySentimentModel, export_sentiment_weights, max_abs_diff
+
+TEXTS = [
+    "I love this, it is great",
+    "terrible product, never again",
+    "it is okay I guess",
+    "absolutely fantastic service!",
+    "the worst. broken on arrival",
+]
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    tf.keras.utils.set_random_seed(0)
+    tokenizer = Tokenizer(num_words=20, oov_token="<OOV>")
+    tokenizer.fit_on_texts(TEXTS)
+    encoder = LabelEncoder().fit(["negative", "neutral", "positive"])
+    # Same layer stack as train_keras.py, scaled down
+    model = Sequential([
+        Input(shape=(None,), dtype="int32"),
+        Embedding(20, 8, mask_zero=True),
+        Bidirectional(LSTM(6, return_sequences=True)),
+        Dropout(0.3),
+        Bidirectional(LSTM(4)),
+        Dense(5, activation="relu"),
+        Dropout(0.3),
+        Dense(3, activation="softmax")
+    ])
+    out_dir = str(tmp_path_factory.mktemp("sentiment_weights"))
+    export_sentiment_weights(model, tokenizer, encoder, out_dir=out_dir)
+    return model, tokenizer, NumpySentimentModel(out_dir)
+
+
+def test_numpy_forward_pass_matches_keras(exported):
+    keras_model, tokenizer, numpy_model = exported
+    X = pad_sequences(tokenizer.texts_to_sequences(TEXTS + ["unseen words entirely", ""]), maxlen=12)
+    diff, agreement = max_abs_diff(keras_model, numpy_model, X)
+    assert diff < 1e-4
+    assert agreement == 1.0
+
+
+def test_token_lookup_matches_keras_tokenizer(exported):
+    _, tokenizer, numpy_model = exported
+    texts = TEXTS + ["Unseen WORDS, great!!", ""]
+    assert numpy_model.tokenizer().texts_to_sequences(texts) == tokenizer.texts_to_sequences(texts)
+    assert list(numpy_model.label_decoder().inverse_transform([0, 2])) == ["negative", "positive"]